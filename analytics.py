@@ -0,0 +1,154 @@
+import numpy as np
+
+from records import DELIVERED, ONBOARD, WAITING
+
+DAY_START_HOUR = 6  # simulated minute 0 is 06:00
+DAY_MINUTES = 24 * 60  # multi-day runs start day d at minute d * DAY_MINUTES
+
+
+def hour_label(hour):
+    return f"{DAY_START_HOUR + hour:02d}:00–{DAY_START_HOUR + hour + 1:02d}:00"
+
+
+def grouped_stats(groups, values, size, quantile=0.95):
+    """Count, mean, sample standard deviation and quantile of `values` per group id in [0, size), in one sort
+
+    NaN values are left out of the mean, deviation and quantile but still counted in "count".
+    """
+    counts = np.bincount(groups, minlength=size)
+    valid = ~np.isnan(values)
+    groups, values = groups[valid], values[valid]
+    n = np.bincount(groups, minlength=size)
+    sums = np.bincount(groups, weights=values, minlength=size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, sums / n, 0.0)
+        squares = np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=size)
+        std = np.sqrt(np.where(n > 1, squares / (n - 1), 0.0))
+
+    # Sort by (group, value) once, then read every group's quantile off its slice
+    order = np.lexsort((values, groups))
+    ordered = values[order]
+    starts = np.concatenate(([0], np.cumsum(n)[:-1]))
+    position = starts + quantile * np.maximum(n - 1, 0)
+    lo = np.floor(position).astype(int)
+    hi = np.ceil(position).astype(int)
+    q = np.zeros(size)
+    has = n > 0
+    q[has] = ordered[lo[has]] + (ordered[hi[has]] - ordered[lo[has]]) * (position[has] - lo[has])
+    return counts, n, mean, std, q
+
+
+def bus_statistics(bus_states, bus_count):
+    """Utilization figures and total in-service minutes from the bus-state table"""
+    total_observations = len(bus_states)
+    if not total_observations:
+        return {"utilization": {}, "bus_minutes": 0.0}
+
+    onboard = bus_states.column("passengers")
+    capacity = bus_states.column("capacity")
+    empty_count = int(np.count_nonzero(onboard == 0))
+    full_count = int(np.count_nonzero(onboard == capacity))
+    avg_utilization = float((onboard / capacity).mean())
+
+    # In service from the first to the last recorded stop of every bus, each day (bus ids repeat across days)
+    times = bus_states.column("time")
+    days = (times // DAY_MINUTES).astype(np.intp)
+    shifts = days * bus_count + bus_states.column("bus").astype(np.intp)
+    first_seen = np.full((int(days.max()) + 1) * bus_count, np.inf)
+    last_seen = np.full(len(first_seen), -np.inf)
+    np.minimum.at(first_seen, shifts, times)
+    np.maximum.at(last_seen, shifts, times)
+    seen = np.isfinite(first_seen)
+
+    return {
+        "utilization": {
+            'total_observations': total_observations,
+            'percent_empty': (empty_count / total_observations) * 100,
+            'percent_full': (full_count / total_observations) * 100,
+            'average_utilization': avg_utilization * 100,
+            'can_board_probability': ((total_observations - full_count) / total_observations) * 100
+        },
+        "bus_minutes": float((last_seen[seen] - first_seen[seen]).sum()),
+    }
+
+
+def compute_analytics(sim):
+    """Per-stop, per-route and per-hour aggregates of a finished run in one grouped pass each"""
+    passengers, packages = sim.passengers, sim.packages
+    stop_names = sim.stops.names
+    n_stops = len(stop_names)
+    route_names = sim.network.route_names
+    n_routes = len(route_names)
+
+    origin = passengers.column("origin").astype(np.intp)
+    route = passengers.column("route").astype(np.intp)
+    arrival = passengers.column("arrival_time")
+    pickup = passengers.column("pickup_time")
+    dropoff = passengers.column("dropoff_time")
+    served = ~np.isnan(dropoff)
+    wait = np.where(served, pickup - arrival, np.nan)
+    travel = np.where(served, dropoff - pickup, np.nan)
+    hour = (arrival % DAY_MINUTES // 60).astype(np.intp)
+
+    delivery_stop = packages.column("delivery_stop").astype(np.intp)
+    package_route = packages.column("route_colour").astype(np.intp)
+    package_hour = (packages.column("arrival_time") % DAY_MINUTES // 60).astype(np.intp)
+    n_hours = max(int(hour.max()) + 1 if len(hour) else 0, int(package_hour.max()) + 1 if len(package_hour) else 0)
+    status = packages.column("status")
+    delivered = status == DELIVERED
+    missed = (status == ONBOARD) | (status == WAITING)
+    delivery_time = np.where(delivered, packages.column("delivery_time") - packages.column("arrival_time"), np.nan)
+
+    def passenger_groups(keys, size):
+        created, n_served, avg_wait, std_wait, p95_wait = grouped_stats(keys, wait, size)
+        _, _, avg_travel, std_travel, p95_travel = grouped_stats(keys, travel, size)
+        return {
+            "created": created,
+            "served": n_served,
+            "avg_wait": avg_wait,
+            "std_wait": std_wait,
+            "p95_wait": p95_wait,
+            "avg_travel": avg_travel,
+            "std_travel": std_travel,
+            "p95_travel": p95_travel,
+        }
+
+    def package_groups(keys, size):
+        return {
+            "packages_created": np.bincount(keys, minlength=size),
+            "packages_delivered": np.bincount(keys, weights=delivered, minlength=size).astype(int),
+            "packages_missed": np.bincount(keys, weights=missed, minlength=size).astype(int),
+        }
+
+    def table(names, *column_sets):
+        rows = {}
+        for i, name in enumerate(names):
+            rows[name] = {key: values[i].item() for columns in column_sets for key, values in columns.items()}
+        return rows
+
+    _, _, avg_travel, _, _ = grouped_stats(np.zeros(len(travel), dtype=np.intp), travel, 1)
+    _, n_delivered, avg_delivery, _, _ = grouped_stats(np.zeros(len(delivery_time), dtype=np.intp), delivery_time, 1)
+    _, _, avg_wait, _, p95_wait = grouped_stats(np.zeros(len(wait), dtype=np.intp), wait, 1)
+
+    return {
+        "passengers": {
+            "created": len(passengers),
+            "served": int(served.sum()),
+            "missed": int(len(passengers) - served.sum()),
+            "service_rate": float(served.mean()) if len(passengers) else 0.0,
+            "avg_wait": float(avg_wait[0]),
+            "p95_wait": float(p95_wait[0]),
+            "avg_travel": float(avg_travel[0]),
+        },
+        "packages": {
+            "created": len(packages),
+            "delivered": int(n_delivered[0]),
+            "remaining": int(missed.sum()),
+            "avg_delivery_time": float(avg_delivery[0]),
+        },
+        "buses": bus_statistics(sim.bus_states, len(sim.buses)),
+        "per_stop": table(stop_names, passenger_groups(origin, n_stops), package_groups(delivery_stop, n_stops)),
+        "per_route": table(route_names, passenger_groups(route, n_routes), package_groups(package_route, n_routes)),
+        "per_hour": table([hour_label(h) for h in range(n_hours)], passenger_groups(hour, n_hours),
+                          package_groups(package_hour, n_hours)),
+    }
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+
+
+class ArrivalSource:
+    """One stop on one leg that generates passengers, with its destination choice weights"""
+
+    __slots__ = ("leg", "stop", "daily_demand", "destinations", "weights")
+
+    def __init__(self, leg, stop, daily_demand, destinations):
+        self.leg = leg
+        self.stop = stop
+        self.daily_demand = daily_demand
+        self.destinations = destinations
+        # Weighted destination selection based on travel times and attractiveness
+        self.weights = [math.exp(-i) for i in range(len(destinations))]
+
+
+def presample_arrivals(rng, sources, hourly_percent, cutoff):
+    """Sample a whole day of arrivals for every source in one batch
+
+    Demand is a piecewise-constant non-homogeneous Poisson process: within hour h a
+    source with daily demand D sees Poisson(D * hourly_percent[h]) arrivals spread
+    uniformly over the hour. Arrivals after `cutoff` minutes are dropped, as the
+    per-stop generators do. Returns (times, source index, destination index), sorted
+    by time.
+    """
+    demand = np.array([source.daily_demand for source in sources], dtype=float)
+    percent = np.asarray(hourly_percent, dtype=float)
+    hours = min(len(percent), math.ceil(cutoff / 60))
+
+    counts = rng.poisson(demand[:, None] * percent[None, :hours])
+    source_ids = np.repeat(np.repeat(np.arange(len(sources)), hours), counts.ravel())
+    hour_ids = np.repeat(np.tile(np.arange(hours), len(sources)), counts.ravel())
+    times = (hour_ids + rng.random(len(hour_ids))) * 60
+
+    keep = times <= cutoff
+    times, source_ids = times[keep], source_ids[keep]
+
+    # Inverse-CDF destination draw for all arrivals at once, one padded CDF row per source
+    width = max(len(source.weights) for source in sources)
+    cdf = np.ones((len(sources), width))
+    for i, source in enumerate(sources):
+        cumulative = np.cumsum(source.weights)
+        cdf[i, :len(cumulative)] = cumulative / cumulative[-1]
+    draws = rng.random(len(times))
+    destination_ids = (draws[:, None] > cdf[source_ids]).sum(axis=1)
+
+    order = np.argsort(times, kind="stable")
+    return times[order], source_ids[order], destination_ids[order]
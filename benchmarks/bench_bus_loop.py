@@ -0,0 +1,67 @@
+"""Drop-off/pick-up inner loop of mothership_bus: onboard list vs. destination buckets
+
+Run from the repository root: python benchmarks/bench_bus_loop.py
+"""
+import os
+import random
+import sys
+import timeit
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim import RED_BUS_STOPS, Onboard  # noqa: E402
+
+CAPACITIES = [22, 60, 200]
+LAPS = 20
+
+
+def make_demand(capacity, rng):
+    """Queues refilled so the bus runs full, as on a busy articulated line"""
+    stops = RED_BUS_STOPS
+    queues = {}
+    for i, stop in enumerate(stops):
+        queues[stop] = [
+            {"destination": rng.choice(stops[i + 1:] + stops[:i])}
+            for _ in range(capacity * LAPS)
+        ]
+    return queues
+
+
+def old_loop(queues, capacity):
+    queues = {stop: deque(waiting) for stop, waiting in queues.items()}
+    onboard = []
+    for _ in range(LAPS):
+        for stop, queue in queues.items():
+            drop_offs = [p for p in onboard if p["destination"] == stop]
+            for passenger in drop_offs:
+                onboard.remove(passenger)
+            while queue and len(onboard) < capacity:
+                onboard.append(queue.popleft())
+
+
+def new_loop(queues, capacity):
+    queues = {stop: deque(waiting) for stop, waiting in queues.items()}
+    onboard = Onboard()
+    for _ in range(LAPS):
+        for stop, queue in queues.items():
+            onboard.pop(stop)
+            while queue and len(onboard) < capacity:
+                passenger = queue.popleft()
+                onboard.add(passenger["destination"], passenger)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'Capacity':>8} | {'List (ms)':>10} | {'Buckets (ms)':>12} | {'Speedup':>7}")
+    print("-" * 48)
+    for capacity in CAPACITIES:
+        queues = make_demand(capacity, rng)
+        runs = 5
+        old = min(timeit.repeat(lambda: old_loop(queues, capacity), number=1, repeat=runs))
+        new = min(timeit.repeat(lambda: new_loop(queues, capacity), number=1, repeat=runs))
+        print(f"{capacity:>8} | {old * 1e3:>10.2f} | {new * 1e3:>12.2f} | {old / new:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Result cache: a seed sweep run cold, rerun warm, then repriced under new costs
+
+The warm pass must return the cold results; the repriced pass must match a fresh
+simulation under the new package price, without simulating.
+
+Run from the repository root: python benchmarks/bench_cache.py [--seeds 30]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ResultCache  # noqa: E402
+from sim import REVENUE_PER_PACKAGE, run_simulation  # noqa: E402
+
+
+def sweep(cache, config, seeds):
+    started = time.perf_counter()
+    summaries = [cache.run(config, seed) for seed in seeds]
+    return summaries, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=30)
+    args = parser.parse_args()
+
+    seeds = range(args.seeds)
+    repriced = {"revenue_per_package": REVENUE_PER_PACKAGE * 1.5}
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(directory)
+        cold, cold_time = sweep(cache, None, seeds)
+        warm, warm_time = sweep(cache, None, seeds)
+        priced, priced_time = sweep(cache, repriced, seeds)
+        size = sum(size for _, size, _ in cache.entries())
+
+    same = all(a["financials"] == b["financials"] and a["passengers_served"] == b["passengers_served"]
+               for a, b in zip(cold, warm))
+    fresh = [run_simulation(repriced, seed)["financials"]["net_profit"] for seed in seeds]
+    repriced_error = max(abs(a["financials"]["net_profit"] - b) for a, b in zip(priced, fresh))
+
+    print(f"{args.seeds} seeds, {size / 1024:.0f} KiB cached, {cache.hits} hits / {cache.misses} misses")
+    print(f"Cold: {cold_time:.2f}s | Warm: {warm_time * 1000:.0f} ms ({cold_time / warm_time:.0f}x) | "
+          f"Repriced: {priced_time * 1000:.0f} ms")
+    print(f"Warm results identical: {same} | Repriced vs. fresh runs, max profit difference: {repriced_error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Record export: cost of writing every replication's records, and reading them all back memory-mapped
+
+Each seed runs in streaming mode with and without an export directory. The read pass
+then computes the mean passenger wait over every exported replication straight from
+the memory-mapped columns.
+
+Run from the repository root: python benchmarks/bench_export.py [--seeds 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import RecordReader  # noqa: E402
+from sim import MothershipSimulation  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=20)
+    args = parser.parse_args()
+
+    seeds = range(args.seeds)
+    config = {"record_mode": "streaming"}
+    started = time.perf_counter()
+    for seed in seeds:
+        MothershipSimulation(config, seed).run()
+    plain_time = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as root:
+        directories = [os.path.join(root, f"seed-{seed}") for seed in seeds]
+        started = time.perf_counter()
+        for seed, directory in zip(seeds, directories):
+            MothershipSimulation({**config, "export": directory}, seed).run()
+        export_time = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(path, name))
+                   for path, _, names in os.walk(root) for name in names)
+
+        started = time.perf_counter()
+        waits, rows = [], 0
+        for directory in directories:
+            reader = RecordReader(directory)
+            pickup, arrival = reader.column("passengers", "pickup_time"), reader.column("passengers", "arrival_time")
+            served = ~np.isnan(pickup)
+            waits.append((pickup[served] - arrival[served]).sum() / served.sum())
+            rows += sum(reader.rows(table) for table in reader.tables)
+        read_time = time.perf_counter() - started
+
+    print(f"{args.seeds} replications: {rows} records, {size / 1024 / 1024:.1f} MiB on disk")
+    print(f"Simulate: {plain_time:.2f}s | Simulate + export: {export_time:.2f}s "
+          f"(+{export_time / plain_time - 1:.0%}) | Read back all: {read_time * 1000:.0f} ms")
+    print(f"Mean wait over all replications: {np.mean(waits):.2f} min")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Robot fleet scaling: wall time and deliveries as the fleet and package volume grow together
+
+Package volume and bus robot capacity scale with the fleet, so every run keeps the
+robots about as busy as the default day does. Each size runs once per dispatch policy.
+On the default day batteries never run low, so both policies dispatch the same robots;
+a second table compares them on a small fleet with long trips and slow charging, where
+the battery binds.
+
+Run from the repository root: python benchmarks/bench_fleet.py [--sizes 72 720 7200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fleet import DISPATCH_POLICIES  # noqa: E402
+from sim import BUS_ROBOT_CAPACITY, PACKAGE_RATE, ROBOTS_IN_WAREHOUSE, MothershipSimulation  # noqa: E402
+
+SEED = 0
+# 24 robots, 20-minute legs, 30-minute reserve and a tenth of the charging speed
+BATTERY_BOUND = {"robots_in_warehouse": 24, "robot_speed": 0.05, "robot_reserve": 30, "robot_charge_rate": 0.1}
+BATTERY_BOUND_SEEDS = range(5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[72, 720, 7200])
+    args = parser.parse_args()
+
+    print(f"{'Robots':>7} | {'Policy':<15} | {'Wall (s)':>8} | {'Packages':>8} | {'Delivered':>9} | "
+          f"{'Robot trips':>11} | {'Avg charge':>10}")
+    print("-" * 86)
+    for size in args.sizes:
+        scale = size / ROBOTS_IN_WAREHOUSE
+        for policy in DISPATCH_POLICIES:
+            config = {
+                "robots_in_warehouse": size,
+                "bus_robot_capacity": round(BUS_ROBOT_CAPACITY * scale),
+                "package_rate": PACKAGE_RATE * scale,
+                "dispatch_policy": policy,
+                "record_mode": "streaming",
+            }
+            sim = MothershipSimulation(config, SEED)
+            started = time.perf_counter()
+            summary = sim.run()
+            wall_time = time.perf_counter() - started
+            fleet = sim.fleet.summary(sim.env.now)
+            print(f"{size:>7} | {policy:<15} | {wall_time:>8.2f} | {summary['packages_created']:>8} | "
+                  f"{summary['packages_delivered']:>9} | {fleet['trips']:>11} | {fleet['average_charge']:>10.1%}")
+
+    print(f"\nBattery-bound day {BATTERY_BOUND}, seeds {BATTERY_BOUND_SEEDS.start}-{BATTERY_BOUND_SEEDS.stop - 1}")
+    print(f"{'Policy':<15} | {'Packages':>8} | {'Delivered':>9} | {'Robot trips':>11} | {'Avg charge':>10}")
+    print("-" * 64)
+    for policy in DISPATCH_POLICIES:
+        created = delivered = trips = 0
+        charge = 0.0
+        for seed in BATTERY_BOUND_SEEDS:
+            sim = MothershipSimulation({**BATTERY_BOUND, "dispatch_policy": policy, "record_mode": "streaming"}, seed)
+            summary = sim.run()
+            fleet = sim.fleet.summary(sim.env.now)
+            created += summary["packages_created"]
+            delivered += summary["packages_delivered"]
+            trips += fleet["trips"]
+            charge += fleet["average_charge"] / len(BATTERY_BOUND_SEEDS)
+        print(f"{policy:<15} | {created:>8} | {delivered:>9} | {trips:>11} | {charge:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
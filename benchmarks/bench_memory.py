@@ -0,0 +1,128 @@
+"""Record-store memory of a real 7-day, 10x-demand run: per-record dicts vs. columnar tables
+
+Every mode simulates the same seeded week at ten times the default passenger demand, in
+its own subprocess so each peak RSS is the run's own:
+
+    dicts      every finished record kept as the dict the simulator used to keep
+    tables     every record kept in the columnar tables (record_mode "full")
+    streaming  no records kept, only the bounded metrics (record_mode "streaming")
+
+The dicts mode runs in streaming mode and receives each record as it finishes, through
+the exporter hook, so nothing but the dicts holds it. Peak RSS growth over the loaded
+interpreter is reported next to the traced allocation peak (traced in a separate run).
+
+Run from the repository root: python benchmarks/bench_memory.py
+"""
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import scaled_demand  # noqa: E402
+from sim import DEFAULT_NETWORK, MothershipSimulation  # noqa: E402
+from records import PACKAGE_STATUSES  # noqa: E402
+
+SEED = 0
+DAYS = 7
+DEMAND_SCALE = 10
+MODES = ("dicts", "tables", "streaming")
+
+
+class DictRecorder:
+    """Takes the exporter's place and keeps each finished record as a dict with stop and bus names"""
+
+    def __init__(self, stops, buses):
+        self.stops = stops.names
+        self.buses = buses.names
+        self.passengers = []
+        self.packages = []
+        self.bus_states = {}
+
+    def add(self, table, **values):  # bus states
+        stop = self.stops[values["stop"]]
+        self.bus_states.setdefault(self.buses[values["bus"]], []).append({
+            "time": values["time"], "stop": stop, "passengers": values["passengers"], "capacity": values["capacity"],
+            "utilization": values["passengers"] / values["capacity"], "picked_up": values["picked_up"],
+            "dropped_off": values["dropped_off"], "robots": values["robots"],
+        })
+
+    def add_row(self, table, records, row):
+        if table == "passengers":
+            passenger = {"origin": self.stops[records.origin[row]], "destination": self.stops[records.destination[row]],
+                         "arrival_time": records.arrival_time[row]}
+            if records.dropoff_time[row] == records.dropoff_time[row]:  # not NaN: served
+                passenger.update(pickup_time=records.pickup_time[row], dropoff_time=records.dropoff_time[row],
+                                 wait_time=records.pickup_time[row] - records.arrival_time[row],
+                                 travel_time=records.dropoff_time[row] - records.pickup_time[row])
+            self.passengers.append(passenger)
+        else:
+            self.packages.append({"id": len(self.packages), "delivery_stop": self.stops[records.delivery_stop[row]],
+                                  "route_colour": records.route_colour[row], "arrival_time": records.arrival_time[row],
+                                  "delivery_time": records.delivery_time[row],
+                                  "status": PACKAGE_STATUSES[records.status[row]], "onboard_bus_id": None})
+
+    def close(self):
+        pass
+
+    def count(self):
+        return len(self.passengers) + len(self.packages) + sum(map(len, self.bus_states.values()))
+
+
+def simulate(mode):
+    """Run the week in `mode`; returns the number of records it keeps"""
+    config = {"days": DAYS, "network": scaled_demand(DEFAULT_NETWORK, DEMAND_SCALE),
+              "record_mode": "full" if mode == "tables" else "streaming"}
+    sim = MothershipSimulation(config, SEED)
+    if mode == "dicts":
+        sim.exporter = recorder = DictRecorder(sim.stops, sim.buses)
+        sim.run()
+        return recorder.count()
+    sim.run()
+    if mode == "tables":
+        return len(sim.passengers) + len(sim.packages) + len(sim.bus_states)
+    return 0
+
+
+def measure(mode, metric):
+    """Print (records kept, bytes); tracing inflates RSS, so each metric gets its own process"""
+    if metric == "traced":
+        tracemalloc.start()
+        count = simulate(mode)
+        _, used = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    else:
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        count = simulate(mode)
+        used = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # ru_maxrss is KiB on Linux
+    print(count, used)
+
+
+def main():
+    if len(sys.argv) > 2:
+        measure(sys.argv[1], sys.argv[2])
+        return
+
+    results = {}
+    for mode in MODES:
+        results[mode] = {}
+        for metric in ("traced", "rss"):
+            output = subprocess.run([sys.executable, __file__, mode, metric],
+                                    capture_output=True, text=True, check=True).stdout
+            count, used = (int(value) for value in output.split())
+            results[mode].update(count=count, **{metric: used})
+
+    print(f"{DAYS}-day, {DEMAND_SCALE}x-demand run (seed {SEED})")
+    print(f"{'Storage':<9} | {'Records kept':>12} | {'Traced peak (MiB)':>17} | {'Peak RSS growth (MiB)':>21}")
+    print("-" * 70)
+    for mode, result in results.items():
+        print(f"{mode:<9} | {result['count']:>12} | {result['traced'] / 2**20:>17.1f} | {result['rss'] / 2**20:>21.1f}")
+    dicts, tables = results["dicts"], results["tables"]
+    print(f"Tables vs. dicts: {dicts['traced'] / tables['traced']:.1f}x less traced, "
+          f"{dicts['rss'] / max(tables['rss'], 1):.1f}x less RSS growth")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Scenario service: per-scenario latency of a cold `python sim.py` against the warm-worker service
+
+Starts the service in-process on a free localhost port, streams one job's progress,
+then times the same seeds three ways: one subprocess per scenario, one POST per
+scenario, and all scenarios in one batched POST.
+
+Run from the repository root: python benchmarks/bench_service.py [--scenarios 8] [--workers 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from service import ScenarioService  # noqa: E402
+
+CONFIG = {}  # the defaults, as a bare `python sim.py --seed N` runs
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if status >= 400:
+        raise RuntimeError(f"{method} {path}: {status} {body.decode()}")
+    return json.loads(body)
+
+
+async def stream_events(port, job_id):
+    """Yield a job's NDJSON events, decoding the chunked body"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET /jobs/{job_id}/events HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        if size == 0:
+            break
+        chunk = await reader.readexactly(size + 2)
+        yield json.loads(chunk[:-2])
+    writer.close()
+
+
+async def wait_for(port, job_ids):
+    results = []
+    for job_id in job_ids:
+        async for event in stream_events(port, job_id):
+            if event["event"] in ("done", "failed"):
+                results.append(event["job"])
+    return results
+
+
+def run_subprocesses(seeds):
+    started = time.perf_counter()
+    for seed in seeds:
+        subprocess.run([sys.executable, os.path.join(ROOT, "sim.py"), "--seed", str(seed)],
+                       check=True, capture_output=True, cwd=ROOT)
+    return time.perf_counter() - started
+
+
+async def bench(args):
+    service = ScenarioService(workers=args.workers, batch_size=args.batch_size)
+    _, port = await service.start("127.0.0.1", 0)
+    seeds = list(range(args.scenarios))
+    try:
+        # Warm-up job, watched through the progress stream
+        job_id = (await request(port, "POST", "/jobs", {"config": CONFIG, "seed": 0}))["jobs"][0]
+        print(f"Progress stream of job {job_id}:")
+        async for event in stream_events(port, job_id):
+            if event["event"] == "progress" and event["sim_time"] % 120 == 0:
+                print(f"  t={event['sim_time']:>5.0f} min  {event['fraction']:>4.0%}  "
+                      f"{event['events_per_second']:>9,.0f} events/s")
+            elif event["event"] != "progress":
+                profit = event["job"]["result"]["financials"]["net_profit"]
+                print(f"  {event['event']}: net profit {profit:.2f} in {event['job']['run_seconds']:.2f}s\n")
+
+        started = time.perf_counter()
+        for seed in seeds:
+            job_id = (await request(port, "POST", "/jobs", {"config": CONFIG, "seed": seed}))["jobs"][0]
+            await wait_for(port, [job_id])
+        sequential_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        job_ids = (await request(port, "POST", "/jobs",
+                                 {"scenarios": [{"config": CONFIG, "seed": seed} for seed in seeds]}))["jobs"]
+        results = await wait_for(port, job_ids)
+        batch_time = time.perf_counter() - started
+        assert all(result["status"] == "done" for result in results)
+        health = await request(port, "GET", "/health")
+    finally:
+        await service.stop()
+
+    subprocess_time = run_subprocesses(seeds)
+    n = args.scenarios
+    print(f"{n} scenarios, {args.workers} workers, "
+          f"{health['jobs']['done']} jobs done")
+    print(f"{'Mode':<24} | {'Total':>8} | {'Per scenario':>12} | {'Speedup':>7}")
+    print("-" * 62)
+    for label, seconds in (("subprocess python sim.py", subprocess_time), ("service, one at a time", sequential_time),
+                           ("service, one batch", batch_time)):
+        print(f"{label:<24} | {seconds:>7.2f}s | {seconds / n * 1000:>9.0f} ms | {subprocess_time / seconds:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", "-n", type=int, default=8)
+    parser.add_argument("--workers", "-j", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=4)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Fixed-seed benchmark suite with a JSON history and regression flagging
+
+Scenarios: the default day, 10x passenger demand, 10x robots and packages, a generated
+50-route network, and a 30-day streaming horizon. Each run happens in a fresh
+subprocess so peak RSS is the scenario's own; the fastest of --repeat runs is kept.
+Results are appended to benchmarks/history.json and compared against the median of
+the previous --window entries; anything worse by more than --threshold is flagged,
+and --fail-on-regression turns a flag into exit status 1.
+
+Run from the repository root: python benchmarks/bench_suite.py
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from network import Network, synthetic_network  # noqa: E402
+from sim import (BUS_ROBOT_CAPACITY, DEFAULT_NETWORK, PACKAGE_RATE, ROBOTS_IN_WAREHOUSE,  # noqa: E402
+                 MothershipSimulation, schedule_for)
+
+SEED = 0
+HISTORY = os.path.join(ROOT, "benchmarks", "history.json")
+
+# metric -> True when higher is better
+METRICS = {
+    "wall_time": False,
+    "events_per_second": True,
+    "sim_days_per_second": True,
+    "peak_rss_mib": False,
+}
+
+
+def scaled_demand(network, factor):
+    data = network.as_dict()
+    for route in data["routes"]:
+        for stop in route["stops"]:
+            stop["expected_daily_passengers"] *= factor
+    return Network.from_dict(data)
+
+
+def baseline():
+    return {}
+
+
+def demand_10x():
+    return {"network": scaled_demand(DEFAULT_NETWORK, 10)}
+
+
+def robots_10x():
+    return {
+        "robots_in_warehouse": ROBOTS_IN_WAREHOUSE * 10,
+        "bus_robot_capacity": BUS_ROBOT_CAPACITY * 10,
+        "package_rate": PACKAGE_RATE * 10,
+    }
+
+
+def routes_50():
+    network = synthetic_network(50)
+    return {"network": network, "schedule": schedule_for(network)}
+
+
+def days_30():
+    return {"days": 30, "record_mode": "streaming"}
+
+
+SCENARIOS = {
+    "baseline": baseline,
+    "demand_10x": demand_10x,
+    "robots_10x": robots_10x,
+    "routes_50": routes_50,
+    "days_30": days_30,
+}
+
+
+def measure(name):
+    """Run one scenario in this process and print its metrics as JSON"""
+    sim = MothershipSimulation(SCENARIOS[name](), SEED)
+    started = time.perf_counter()
+    summary = sim.run()
+    wall_time = time.perf_counter() - started
+    print(json.dumps({
+        "wall_time": wall_time,
+        "events": sim.events,
+        "events_per_second": sim.events / wall_time,
+        "sim_days_per_second": sim.config["days"] / wall_time,
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # ru_maxrss is KiB on Linux
+        "passengers_served": summary["passengers_served"],
+        "net_profit": summary["financials"]["net_profit"],
+    }))
+
+
+def run_scenario(name, repeat):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, __file__, "--measure", name],
+                                capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+    return min(runs, key=lambda run: run["wall_time"])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(results, history, threshold, window):
+    """(scenario, metric, reference, value, change) for every metric worse than the recent median by > threshold"""
+    flagged = []
+    for name, result in results.items():
+        previous = [entry["results"][name] for entry in history[-window:] if name in entry["results"]]
+        if not previous:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            reference = statistics.median(run[metric] for run in previous)
+            if not reference:
+                continue
+            change = (result[metric] - reference) / reference
+            if (-change if higher_is_better else change) > threshold:
+                flagged.append((name, metric, reference, result[metric], change))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    parser.add_argument("--window", type=int, default=5, help="history entries in the reference median")
+    parser.add_argument("--history", default=HISTORY)
+    parser.add_argument("--no-save", action="store_true", help="compare against the history without appending")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure)
+        return
+
+    results = {name: run_scenario(name, args.repeat) for name in args.scenarios}
+
+    print(f"{'Scenario':<12} | {'Wall (s)':>9} | {'Events/s':>10} | {'Sim-days/s':>10} | {'Peak RSS (MiB)':>14}")
+    print("-" * 67)
+    for name, result in results.items():
+        print(f"{name:<12} | {result['wall_time']:>9.3f} | {result['events_per_second']:>10.0f} | "
+              f"{result['sim_days_per_second']:>10.2f} | {result['peak_rss_mib']:>14.1f}")
+
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history) as f:
+            history = json.load(f)
+    flagged = regressions(results, history, args.threshold, args.window)
+    for name, metric, reference, value, change in flagged:
+        print(f"REGRESSION {name}.{metric}: {value:.4g} vs median {reference:.4g} ({change:+.1%})")
+    if history and not flagged:
+        print(f"No regressions beyond {args.threshold:.0%} against the last {min(args.window, len(history))} runs")
+
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "seed": SEED,
+            "repeat": args.repeat,
+            "results": results,
+        })
+        with open(args.history, "w") as f:
+            json.dump(history, f, indent=2)
+
+    if flagged and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Per-departure package dispatch cost: linear scan vs. indexed warehouse
+
+Each departure fills up to BUS_ROBOT_CAPACITY robots with up to ROBOT_CAPACITY packages
+for one delivery stop each, as a bus loads in the simulation. Packages go to random stops
+of the default network.
+
+Run from the repository root: python benchmarks/bench_warehouse.py
+"""
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import PackageTable  # noqa: E402
+from sim import BUS_ROBOT_CAPACITY, DEFAULT_NETWORK, ROBOT_CAPACITY  # noqa: E402
+from warehouse import PackageWarehouse  # noqa: E402
+
+VOLUMES = [200, 1_000, 10_000, 100_000]
+WAITING_SHARE = 0.05  # late in the day most packages are already delivered
+
+
+def make_packages(count, rng):
+    packages = []
+    for i in range(count):
+        stop = rng.choice(DEFAULT_NETWORK.package_stops)
+        packages.append({
+            "id": i,
+            "delivery_stop": stop,
+            "route_colour": DEFAULT_NETWORK.package_route[stop],
+            "arrival_time": i * 960 / count,
+            "status": "delivered" if i < count * (1 - WAITING_SHARE) else "waiting_in_warehouse",
+        })
+    return packages
+
+
+def linear_dispatch(all_packages, route_colour, now):
+    """Scan every package of the day, filling one robot per stop in arrival order"""
+    groups = []
+    filling = {}
+    for pkg in all_packages:
+        if pkg["status"] == "waiting_in_warehouse" and pkg["route_colour"] == route_colour and pkg["arrival_time"] <= now:
+            group = filling.get(pkg["delivery_stop"])
+            if group is None or len(group) == ROBOT_CAPACITY:
+                if len(groups) == BUS_ROBOT_CAPACITY:
+                    break
+                group = filling[pkg["delivery_stop"]] = []
+                groups.append((pkg["delivery_stop"], group))
+            pkg["status"] = "onboard"
+            group.append(pkg)
+    for _, group in groups:
+        for pkg in group:
+            pkg["status"] = "waiting_in_warehouse"
+    return groups
+
+
+def make_warehouse(packages):
+    table = PackageTable(DEFAULT_NETWORK.stops)
+    warehouse = PackageWarehouse(table, len(DEFAULT_NETWORK.routes))
+    for pkg in packages:
+        row = table.add(pkg["delivery_stop"], pkg["route_colour"], pkg["arrival_time"])
+        if pkg["status"] == "waiting_in_warehouse":
+            warehouse.add(row)
+    return warehouse
+
+
+def indexed_dispatch(warehouse, route_colour):
+    groups = warehouse.load_by_stop(route_colour, BUS_ROBOT_CAPACITY, ROBOT_CAPACITY)
+    for _, packages in groups:
+        warehouse.return_packages(packages)
+    return groups
+
+
+def main():
+    rng = random.Random(0)
+    route = 1
+    print(f"{'Packages/day':>12} | {'Linear scan (µs)':>16} | {'Warehouse (µs)':>14} | {'Robots filled':>13}")
+    print("-" * 66)
+    for volume in VOLUMES:
+        packages = make_packages(volume, rng)
+        warehouse = make_warehouse(packages)
+        robots = len(indexed_dispatch(warehouse, route))
+        assert robots == len(linear_dispatch(packages, route, 960))
+
+        runs = 200
+        linear = timeit.timeit(lambda: linear_dispatch(packages, route, 960), number=runs) / runs
+        indexed = timeit.timeit(lambda: indexed_dispatch(warehouse, route), number=runs) / runs
+        print(f"{volume:>12} | {linear * 1e6:>16.1f} | {indexed * 1e6:>14.1f} | {robots:>13}")
+
+
+if __name__ == "__main__":
+    main()
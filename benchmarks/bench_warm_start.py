@@ -0,0 +1,79 @@
+"""Evening-peak what-ifs: simulate every scenario from 06:00 vs. branch them from a 16:00 snapshot
+
+Each scenario changes the Peak-PM block. Cold runs pay for the identical morning every
+time; warm runs simulate it once, snapshot, and restore the snapshot per scenario. Both
+must produce the same results.
+
+Fleet and random-stream what-ifs cannot be branched: restoring with one must raise, and
+a snapshot of a run configured with one must carry on exactly like its cold run.
+
+Run from the repository root: python benchmarks/bench_warm_start.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sim import DEFAULT_SCHEDULE, MothershipSimulation  # noqa: E402
+
+SEED = 0
+FORK_AT = 600  # 16:00, when Peak-PM launches
+FLEET_WHAT_IF = {"robots_in_warehouse": 2}
+
+
+def scenarios():
+    for red in range(0, 5):
+        for blue in range(0, 3):
+            schedule = [dict(block) for block in DEFAULT_SCHEDULE]
+            peak = next(block for block in schedule if block["label"] == "Peak-PM")
+            peak.update(red=red, blue=blue)
+            yield {"schedule": schedule}
+
+
+def same_results(a, b):
+    return (a["financials"] == b["financials"] and a["passengers_served"] == b["passengers_served"]
+            and a["packages_delivered"] == b["packages_delivered"])
+
+
+def check_fleet_what_if(snapshot):
+    """True if restoring with FLEET_WHAT_IF raises and a snapshot of a run configured with it matches its cold run"""
+    try:
+        MothershipSimulation.restore(snapshot, FLEET_WHAT_IF)
+        return False
+    except ValueError:
+        pass
+    prefix = MothershipSimulation(FLEET_WHAT_IF, SEED)
+    prefix.advance(FORK_AT)
+    warm = MothershipSimulation.restore(prefix.snapshot()).run()
+    return same_results(warm, MothershipSimulation(FLEET_WHAT_IF, SEED).run())
+
+
+def main():
+    overrides = list(scenarios())
+
+    started = time.perf_counter()
+    cold = [MothershipSimulation(scenario, SEED).run() for scenario in overrides]
+    cold_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    prefix = MothershipSimulation(seed=SEED)
+    prefix.advance(FORK_AT)
+    snapshot = prefix.snapshot()
+    snapshot_time = time.perf_counter() - started
+    warm = [MothershipSimulation.restore(snapshot, scenario).run() for scenario in overrides]
+    warm_time = time.perf_counter() - started
+
+    same = all(same_results(a, b) for a, b in zip(cold, warm))
+    fleet_ok = check_fleet_what_if(snapshot)
+    print(f"{len(overrides)} Peak-PM scenarios, branched at minute {FORK_AT}")
+    print(f"Snapshot: {len(snapshot) / 1024:.1f} KiB, prefix + snapshot {snapshot_time * 1000:.0f} ms")
+    print(f"Cold: {cold_time:.2f}s | Warm: {warm_time:.2f}s | Speedup: {cold_time / warm_time:.1f}x | "
+          f"Identical results: {same}")
+    print(f"Fleet what-if {FLEET_WHAT_IF} refused on restore, and matches its cold run when configured: {fleet_ok}")
+    if not (same and fleet_ok):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from records import BusStateTable, PackageTable, PassengerTable
+
+CHUNK_ROWS = 65536
+SCHEMA_FILE = "schema.json"
+
+# Exported tables and their columns, as in the record tables; integer columns that
+# index a dictionary (stop, bus and route names, package statuses) are stored as codes
+TABLES = {
+    "passengers": PassengerTable.COLUMNS,
+    "packages": PackageTable.COLUMNS,
+    "bus_states": BusStateTable.COLUMNS,
+}
+DICTIONARY_COLUMNS = {
+    "passengers": {"origin": "stops", "destination": "stops", "route": "routes"},
+    "packages": {"delivery_stop": "stops", "route_colour": "routes", "status": "package_statuses"},
+    "bus_states": {"bus": "buses", "stop": "stops"},
+}
+
+
+class RecordExporter:
+    """Appends finished records to per-column binary files while the simulation runs
+
+    Each table is a directory with one raw little-endian file per column; rows are
+    buffered in typed arrays and appended every `chunk_rows` rows, so memory stays
+    bounded however long the run. schema.json (dtypes, row counts, the dictionaries) is
+    rewritten on every flush, so a reader always sees a consistent prefix.
+    """
+
+    def __init__(self, directory, dictionaries, metadata=None, chunk_rows=CHUNK_ROWS):
+        self.directory = directory
+        self.dictionaries = dictionaries  # name -> list of names, may still grow (buses)
+        self.metadata = metadata or {}
+        self.chunk_rows = chunk_rows
+        self.rows = dict.fromkeys(TABLES, 0)
+        self.buffers = {table: {name: array(typecode) for name, typecode, _ in columns}
+                        for table, columns in TABLES.items()}
+        for table in TABLES:
+            os.makedirs(os.path.join(directory, table), exist_ok=True)
+            for name, _, _ in TABLES[table]:
+                open(self._path(table, name), "wb").close()
+        self._write_schema()
+
+    def _path(self, table, column):
+        return os.path.join(self.directory, table, column + ".bin")
+
+    def add(self, table, **values):
+        buffers = self.buffers[table]
+        for name, buffer in buffers.items():
+            buffer.append(values[name])
+        if len(buffer) >= self.chunk_rows:
+            self.flush(table)
+
+    def add_row(self, table, records, row):
+        """Copy row `row` of the record table `records` (the table's own columns)"""
+        buffers = self.buffers[table]
+        for name, buffer in buffers.items():
+            buffer.append(getattr(records, name)[row])
+        if len(buffer) >= self.chunk_rows:
+            self.flush(table)
+
+    def flush(self, table=None):
+        for name in [table] if table else TABLES:
+            buffers = self.buffers[name]
+            count = 0
+            for column, buffer in buffers.items():
+                with open(self._path(name, column), "ab") as f:
+                    buffer.tofile(f)
+                count = len(buffer)
+                del buffer[:]
+            self.rows[name] += count
+        self._write_schema()
+
+    def close(self):
+        self.flush()
+
+    def _write_schema(self):
+        schema = {
+            "metadata": self.metadata,
+            "dictionaries": {name: list(values) for name, values in self.dictionaries.items()},
+            "tables": {
+                table: {
+                    "rows": self.rows[table],
+                    "columns": {name: {"dtype": np.dtype(typecode).newbyteorder("<").str,
+                                       "dictionary": DICTIONARY_COLUMNS[table].get(name)}
+                                for name, typecode, _ in columns},
+                }
+                for table, columns in TABLES.items()
+            },
+        }
+        partial = os.path.join(self.directory, SCHEMA_FILE + ".tmp")
+        with open(partial, "w") as f:
+            json.dump(schema, f)
+        os.replace(partial, os.path.join(self.directory, SCHEMA_FILE))
+
+
+class RecordReader:
+    """Memory-mapped, zero-copy access to a RecordExporter directory"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, SCHEMA_FILE)) as f:
+            schema = json.load(f)
+        self.metadata = schema["metadata"]
+        self.dictionaries = schema["dictionaries"]
+        self.tables = schema["tables"]
+
+    def rows(self, table):
+        return self.tables[table]["rows"]
+
+    def column(self, table, name):
+        """The column as a read-only NumPy memmap (dictionary columns as their codes)"""
+        spec = self.tables[table]["columns"][name]
+        rows = self.tables[table]["rows"]
+        if rows == 0:
+            return np.empty(0, dtype=spec["dtype"])
+        return np.memmap(os.path.join(self.directory, table, name + ".bin"), dtype=spec["dtype"], mode="r",
+                         shape=(rows,))
+
+    def table(self, table):
+        return {name: self.column(table, name) for name in self.tables[table]["columns"]}
+
+    def decode(self, table, name):
+        """A dictionary column as its names"""
+        dictionary = self.tables[table]["columns"][name]["dictionary"]
+        if dictionary is None:
+            raise ValueError(f"{table}.{name} is not dictionary-encoded")
+        return np.asarray(self.dictionaries[dictionary], dtype=object)[self.column(table, name)]
+
+    def to_arrow(self, table):
+        """The table as a pyarrow.Table, dictionary columns as DictionaryArrays (needs pyarrow)"""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("to_arrow needs pyarrow: pip install pyarrow") from None
+        arrays = {}
+        for name, spec in self.tables[table]["columns"].items():
+            values = self.column(table, name)
+            if spec["dictionary"] is None:
+                arrays[name] = pa.array(values)
+            else:
+                arrays[name] = pa.DictionaryArray.from_arrays(values, pa.array(self.dictionaries[spec["dictionary"]]))
+        return pa.table(arrays)
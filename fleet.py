@@ -0,0 +1,194 @@
+import heapq
+
+from records import RecordTable
+
+ROBOT_STATES = ("docked", "onboard", "delivering", "waiting_for_bus")
+DOCKED, ONBOARD, DELIVERING, WAITING_FOR_BUS = range(len(ROBOT_STATES))
+
+
+class RobotView:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    state = property(lambda self: ROBOT_STATES[self.table.state[self.row]])
+    stop = property(lambda self: self.table.stops.names[self.table.stop[self.row]] if self.table.stop[self.row] >= 0
+                    else None)
+    battery = property(lambda self: self.table.battery[self.row])
+    docked_at = property(lambda self: self.table.docked_at[self.row])
+    trips = property(lambda self: self.table.trips[self.row])
+    deliveries = property(lambda self: self.table.deliveries[self.row])
+
+
+class RobotTable(RecordTable):
+    COLUMNS = (
+        ("state", "b", DOCKED),
+        ("stop", "h", -1),  # where the robot gets off the bus, while it is out
+        ("battery", "d", 0.0),  # minutes of driving left, as of docked_at while docked
+        ("docked_at", "d", 0.0),
+        ("trips", "l", 0),
+        ("deliveries", "l", 0),
+    )
+    VIEW = RobotView
+
+
+# === Dispatch policies ===
+# A policy gets the fleet, the current time and how many robots the bus wants, and picks
+# that many (or fewer) docked robots with at least `reserve` minutes of charge. The built-in
+# ones take robots off the fleet's charge indexes; a custom policy can scan `fleet.docked`.
+def longest_docked(fleet, now, count):
+    """Robots in the order they docked, skipping any still charging below the reserve"""
+    fleet.promote(fleet.charging, fleet.ready, now, fleet.reserve)
+    return fleet.take(fleet.ready, count)
+
+
+def most_charged(fleet, now, count):
+    """The fullest batteries first"""
+    fleet.promote(fleet.filling, fleet.full, now, fleet.battery_capacity)
+    chosen = fleet.take(fleet.full, count)
+    return chosen + fleet.take(fleet.filling, count - len(chosen), now, fleet.reserve)
+
+
+DISPATCH_POLICIES = {
+    "longest_docked": longest_docked,
+    "most_charged": most_charged,
+}
+
+
+class RobotFleet:
+    """Every delivery robot, the docked pool indexed by charge, and the policy that picks who leaves on a bus
+
+    Batteries charge lazily: a docked robot's charge is worked out from when it docked, whenever asked for.
+    """
+
+    def __init__(self, size, stops, capacity, battery, charge_rate, reserve, policy="longest_docked"):
+        if not callable(policy):
+            if policy not in DISPATCH_POLICIES:
+                raise ValueError(f"Unknown dispatch policy: {policy}")
+            policy = DISPATCH_POLICIES[policy]
+        if reserve > battery:
+            raise ValueError("Robot battery reserve exceeds the battery")
+        self.capacity = capacity
+        self.battery_capacity = battery
+        self.charge_rate = charge_rate
+        self.reserve = reserve
+        self.policy = policy
+
+        self.robots = RobotTable(stops)
+        for _ in range(size):
+            self.robots.battery[self.robots._new_row()] = battery
+        self.cargo = [[] for _ in range(size)]
+        self.docked = dict.fromkeys(range(size))
+
+        # Charge indexes over the docked robots; `docking` holds each robot's current docking
+        # number (None while out), which tells live heap entries from stale ones
+        self.docking = list(range(size))
+        self.docked_count = size  # robots docked so far, the next docking number
+        self.charging = []  # below the reserve, fullest first
+        self.ready = [(robot, robot) for robot in range(size)]  # at or above the reserve, in docking order
+        self.filling = []  # below a full charge, fullest first
+        self.full = list(self.ready)  # fully charged, in docking order
+        self.state_counts = [0] * len(ROBOT_STATES)
+        self.state_counts[DOCKED] = size
+
+    def __len__(self):
+        return len(self.robots)
+
+    def charge(self, robot, now):
+        """Minutes of driving left in `robot` at `now`"""
+        robots = self.robots
+        if robots.state[robot] != DOCKED:
+            return robots.battery[robot]
+        return min(self.battery_capacity, robots.battery[robot] + (now - robots.docked_at[robot]) * self.charge_rate)
+
+    def set_state(self, robot, state):
+        counts = self.state_counts
+        counts[self.robots.state[robot]] -= 1
+        counts[state] += 1
+        self.robots.state[robot] = state
+
+    # === Depot ===
+    def dispatch(self, now, count):
+        """Take up to `count` robots out of the depot, chosen by the dispatch policy"""
+        robots = self.policy(self, now, count)
+        for robot in robots:
+            del self.docked[robot]
+            self.docking[robot] = None
+            self.robots.battery[robot] = self.charge(robot, now)
+            self.set_state(robot, ONBOARD)
+        # Drop stale entries once they outnumber the docked robots
+        for heap in (self.charging, self.ready, self.filling, self.full):
+            if len(heap) > 2 * len(self.docked) + 16:
+                heap[:] = [entry for entry in heap if self.docking[entry[-1]] == entry[-2]]
+                heapq.heapify(heap)
+        return robots
+
+    def promote(self, source, target, now, level):
+        """Move robots that have charged up to `level` from the `source` heap to the `target` heap"""
+        docking = self.docking
+        while source:
+            _, number, robot = source[0]
+            if docking[robot] == number:
+                if self.charge(robot, now) < level:
+                    break
+                heapq.heappush(target, (number, robot))
+            heapq.heappop(source)
+
+    def take(self, heap, count, now=None, level=None):
+        """Pop up to `count` docked robots off `heap`, stopping at one charged below `level` if given"""
+        docking = self.docking
+        robots = []
+        while heap and len(robots) < count:
+            robot = heap[0][-1]
+            if docking[robot] == heap[0][-2]:
+                if level is not None and self.charge(robot, now) < level:
+                    break
+                robots.append(robot)
+            heapq.heappop(heap)
+        return robots
+
+    def load(self, robot, stop, packages):
+        self.robots.stop[robot] = stop
+        self.robots.trips[robot] += 1
+        self.cargo[robot] = packages
+
+    def dock(self, robot, now):
+        """Put `robot` back in the pool to charge; returns the packages it still carries"""
+        cargo = self.cargo[robot]
+        self.cargo[robot] = []
+        self.robots.stop[robot] = -1
+        self.robots.docked_at[robot] = now
+        self.set_state(robot, DOCKED)
+        self.docked[robot] = None
+
+        number = self.docking[robot] = self.docked_count
+        self.docked_count += 1
+        battery = self.robots.battery[robot]
+        entry = (now * self.charge_rate - battery, number, robot)
+        if battery < self.reserve:
+            heapq.heappush(self.charging, entry)
+        else:
+            heapq.heappush(self.ready, (number, robot))
+        if battery < self.battery_capacity:
+            heapq.heappush(self.filling, entry)
+        else:
+            heapq.heappush(self.full, (number, robot))
+        return cargo
+
+    # === Out on deliveries ===
+    def drive(self, robot, minutes):
+        battery = self.robots.battery
+        battery[robot] = max(battery[robot] - minutes, 0.0)
+
+    def summary(self, now):
+        charges = [self.charge(robot, now) for robot in range(len(self))]
+        return {
+            "robots": len(self),
+            "states": dict(zip(ROBOT_STATES, self.state_counts)),
+            "trips": sum(self.robots.trips),
+            "deliveries": sum(self.robots.deliveries),
+            "average_charge": sum(charges) / len(charges) / self.battery_capacity if charges else 0.0,
+            "flat": sum(1 for charge in charges if charge < self.reserve),
+        }
@@ -0,0 +1,235 @@
+import math
+
+from analytics import DAY_MINUTES, hour_label
+from records import ROUTE_COLOURS
+
+
+class RunningStats:
+    """Count, mean and variance in O(1) memory (Welford's algorithm)"""
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """Streaming quantile estimate with five markers (Jain & Chlamtac's P² algorithm)"""
+
+    __slots__ = ("p", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p):
+        self.p = p
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        heights = self._heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            k = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            k = 3
+        else:
+            k = 0
+            while value >= heights[k + 1]:
+                k += 1
+
+        positions = self._positions
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        # Nudge the three middle markers towards their desired positions
+        for i in range(1, 4):
+            d = self._desired[i] - positions[i]
+            if (d >= 1 and positions[i + 1] - positions[i] > 1) or (d <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if not heights[i - 1] < candidate < heights[i + 1]:
+                    candidate = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = candidate
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self):
+        heights = self._heights
+        if not heights:
+            return 0.0
+        if len(heights) < 5:
+            # Too few samples for the markers: exact linear-interpolated quantile
+            position = self.p * (len(heights) - 1)
+            lo = math.floor(position)
+            hi = math.ceil(position)
+            return heights[lo] + (heights[hi] - heights[lo]) * (position - lo)
+        return heights[2]
+
+
+class GroupStats:
+    """Counters and wait- and travel-time accumulators for one stop, route or hour"""
+
+    __slots__ = ("created", "wait", "wait_p95", "travel", "travel_p95", "packages_created", "packages_delivered")
+
+    def __init__(self):
+        self.created = 0
+        self.wait = RunningStats()
+        self.wait_p95 = P2Quantile(0.95)
+        self.travel = RunningStats()
+        self.travel_p95 = P2Quantile(0.95)
+        self.packages_created = 0
+        self.packages_delivered = 0
+
+    def served(self, wait, travel):
+        self.wait.add(wait)
+        self.wait_p95.add(wait)
+        self.travel.add(travel)
+        self.travel_p95.add(travel)
+
+    def as_row(self):
+        return {
+            "created": self.created,
+            "served": self.wait.count,
+            "avg_wait": self.wait.mean,
+            "std_wait": self.wait.std,
+            "p95_wait": self.wait_p95.value,
+            "avg_travel": self.travel.mean,
+            "std_travel": self.travel.std,
+            "p95_travel": self.travel_p95.value,
+            "packages_created": self.packages_created,
+            "packages_delivered": self.packages_delivered,
+            "packages_missed": self.packages_created - self.packages_delivered,
+        }
+
+
+class StreamingMetrics:
+    """Online replacement for the record tables: everything compute_analytics reports, in O(groups) memory
+
+    Memory depends on the number of stops, routes, hours of the day and buses, never on
+    how many passengers or packages the run has seen: peak RSS is the same at 10 and 60
+    days. The price is speed: every finished passenger updates four groups of Welford and
+    P² accumulators in Python, so a run takes about twice as long as with full records.
+    """
+
+    def __init__(self, stops, buses, routes=ROUTE_COLOURS):
+        self.stops = stops
+        self.buses = buses
+        self.routes = routes
+        self.per_stop = [GroupStats() for _ in range(len(stops))]
+        self.per_route = [GroupStats() for _ in routes]
+        self.per_hour = []
+        self.total = GroupStats()
+        self.delivery = RunningStats()
+        self.bus_observations = 0
+        self.bus_empty = 0
+        self.bus_full = 0
+        self.bus_utilization = RunningStats()
+        self.bus_minutes = 0.0
+        self._bus_last = {}
+
+    def _hour(self, arrival_time):
+        hour = int(arrival_time % DAY_MINUTES // 60)
+        while len(self.per_hour) <= hour:
+            self.per_hour.append(GroupStats())
+        return self.per_hour[hour]
+
+    # === Event hooks called by the simulation ===
+    def passenger_created(self, origin, route, arrival_time):
+        for group in (self.per_stop[origin], self.per_route[route], self._hour(arrival_time), self.total):
+            group.created += 1
+
+    def passenger_served(self, origin, route, arrival_time, pickup_time, dropoff_time):
+        wait = pickup_time - arrival_time
+        travel = dropoff_time - pickup_time
+        for group in (self.per_stop[origin], self.per_route[route], self._hour(arrival_time), self.total):
+            group.served(wait, travel)
+
+    def package_created(self, delivery_stop, route, arrival_time):
+        for group in (self.per_stop[delivery_stop], self.per_route[route], self._hour(arrival_time), self.total):
+            group.packages_created += 1
+
+    def package_delivered(self, delivery_stop, route, arrival_time, delivery_time):
+        for group in (self.per_stop[delivery_stop], self.per_route[route], self._hour(arrival_time), self.total):
+            group.packages_delivered += 1
+        self.delivery.add(delivery_time - arrival_time)
+
+    def bus_state(self, bus, time, passengers, capacity):
+        self.bus_observations += 1
+        self.bus_empty += passengers == 0
+        self.bus_full += passengers == capacity
+        self.bus_utilization.add(passengers / capacity)
+        # Bus ids are schedule slots that come back every day: only stops of one day add up
+        last = self._bus_last.get(bus)
+        if last is not None and last // DAY_MINUTES == time // DAY_MINUTES:
+            self.bus_minutes += time - last
+        self._bus_last[bus] = time
+
+    # === Results ===
+    def snapshot(self):
+        """Aggregates in the same shape compute_analytics returns"""
+        total = self.total
+        observations = self.bus_observations
+        utilization = {}
+        if observations:
+            utilization = {
+                'total_observations': observations,
+                'percent_empty': (self.bus_empty / observations) * 100,
+                'percent_full': (self.bus_full / observations) * 100,
+                'average_utilization': self.bus_utilization.mean * 100,
+                'can_board_probability': ((observations - self.bus_full) / observations) * 100
+            }
+        return {
+            "passengers": {
+                "created": total.created,
+                "served": total.wait.count,
+                "missed": total.created - total.wait.count,
+                "service_rate": total.wait.count / total.created if total.created else 0.0,
+                "avg_wait": total.wait.mean,
+                "p95_wait": total.wait_p95.value,
+                "avg_travel": total.travel.mean,
+            },
+            "packages": {
+                "created": total.packages_created,
+                "delivered": total.packages_delivered,
+                "remaining": total.packages_created - total.packages_delivered,
+                "avg_delivery_time": self.delivery.mean,
+            },
+            "buses": {
+                "utilization": utilization,
+                "bus_minutes": self.bus_minutes,
+            },
+            "per_stop": {name: group.as_row() for name, group in zip(self.stops.names, self.per_stop)},
+            "per_route": {name: group.as_row() for name, group in zip(self.routes, self.per_route)},
+            "per_hour": {hour_label(h): group.as_row() for h, group in enumerate(self.per_hour)},
+        }
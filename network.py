@@ -0,0 +1,264 @@
+import csv
+import json
+import os
+import random
+from collections import defaultdict
+
+from records import NameIndex
+
+TOPOLOGIES = ("loop", "out_and_back")
+
+
+class Leg:
+    """One direction of travel along a route, with every stop's reachable destinations precomputed
+
+    Buses pick up robots from the warehouse at the start of `loads_robots` legs and collect
+    robots back from the stops on `collects_robots` legs.
+    """
+
+    __slots__ = ("index", "route", "direction", "stops", "destinations", "loads_robots", "collects_robots")
+
+    def __init__(self, index, route, direction, stops, destinations, loads_robots, collects_robots):
+        self.index = index
+        self.route = route
+        self.direction = direction
+        self.stops = stops
+        self.destinations = destinations
+        self.loads_robots = loads_robots
+        self.collects_robots = collects_robots
+
+
+class Route:
+    """A bus line: its stop ids, segment travel times, demand and the trips a bus cycles through"""
+
+    __slots__ = ("index", "name", "topology", "stops", "travel_times", "demand", "terminals", "legs",
+                 "first_trip", "trip_cycle")
+
+    def __init__(self, index, name, topology, stops, travel_times, demand):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology for route {name!r}: {topology}")
+        if len(stops) < 2:
+            raise ValueError(f"Route {name!r} needs at least two stops")
+        self.index = index
+        self.name = name
+        self.topology = topology
+        self.stops = stops
+        self.travel_times = travel_times  # travel_times[i]: minutes from stops[i] to the next stop
+        self.demand = demand
+        self.legs = []
+        if topology == "loop":
+            self.terminals = frozenset(stops[:1])
+        else:
+            self.terminals = frozenset((stops[0], stops[-1]))
+
+    def build_legs(self, first_leg_index):
+        """Create the route's legs and its trip pattern; returns the legs"""
+        stops, times = self.stops, self.travel_times
+        n = len(stops)
+        if self.topology == "loop":
+            # Passengers ride round the loop to any other stop
+            destinations = {stop: stops[i + 1:] + stops[:i] for i, stop in enumerate(stops)}
+            loop = Leg(first_leg_index, self, "forward", stops, destinations, True, True)
+            self.legs = [loop]
+            self.first_trip = (loop, stops, times)
+            self.trip_cycle = [self.first_trip]
+        else:
+            # Robots ride out on the forward leg and are collected on the way back to the depot
+            backward_stops = stops[::-1]
+            backward_times = times[n - 2::-1] + [0]
+            forward = Leg(first_leg_index, self, "forward", stops,
+                          {stop: stops[i + 1:] for i, stop in enumerate(stops)}, True, False)
+            backward = Leg(first_leg_index + 1, self, "backward", backward_stops,
+                           {stop: backward_stops[i + 1:] for i, stop in enumerate(backward_stops)}, False, True)
+            self.legs = [forward, backward]
+            self.first_trip = (forward, stops, times)
+            # After the first trip the bus starts each forward leg from the stop it just turned at
+            self.trip_cycle = [(backward, backward_stops, backward_times), (forward, stops[1:], times[1:])]
+        return self.legs
+
+    def trip(self, number):
+        """The (leg, stops, travel times) of a bus's `number`th trip on this route, counting from 0"""
+        if number == 0:
+            return self.first_trip
+        return self.trip_cycle[(number - 1) % len(self.trip_cycle)]
+
+
+class Network:
+    """Stops and routes with O(1) lookups by id
+
+    `routes` is a list of {"name", "topology", "stops": [{"stop", "travel_time_to_next",
+    "expected_daily_passengers"}]}; topology is "loop" or "out_and_back". Stops may be
+    shared between routes. The depot is where the warehouse sits; packages are never
+    addressed to it.
+    """
+
+    def __init__(self, routes, depot=None):
+        self.stops = NameIndex()
+        self.routes = []
+        self.legs = []
+        for spec in routes:
+            name = spec["name"]
+            if any(route.name == name for route in self.routes):
+                raise ValueError(f"Duplicate route: {name}")
+            route_stops = spec["stops"]
+            route = Route(
+                len(self.routes), name, spec.get("topology", "out_and_back"),
+                [self.stops.intern(stop["stop"]) for stop in route_stops],
+                [stop.get("travel_time_to_next", 0) for stop in route_stops],
+                [stop.get("expected_daily_passengers", 0) for stop in route_stops],
+            )
+            self.routes.append(route)
+            self.legs.extend(route.build_legs(len(self.legs)))
+        if not self.routes:
+            raise ValueError("Network has no routes")
+
+        self.route_names = tuple(route.name for route in self.routes)
+        self.routes_by_name = {route.name: route for route in self.routes}
+        depot = depot if depot is not None else self.stops.names[self.routes[0].stops[0]]
+        if depot not in self.stops.ids:
+            raise ValueError(f"Depot {depot!r} is not on any route")
+        self.depot = self.stops.ids[depot]
+
+        # Packages go by the first route serving their stop
+        self.stop_routes = defaultdict(list)
+        for route in self.routes:
+            for stop in route.stops:
+                if route not in self.stop_routes[stop]:
+                    self.stop_routes[stop].append(route)
+        self.package_stops = sorted((stop for stop in self.stop_routes if stop != self.depot),
+                                    key=self.stops.names.__getitem__)
+        self.package_route = {stop: self.stop_routes[stop][0].index for stop in self.package_stops}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["routes"], data.get("depot"))
+
+    def as_dict(self):
+        names = self.stops.names
+        return {
+            "depot": names[self.depot],
+            "routes": [
+                {
+                    "name": route.name,
+                    "topology": route.topology,
+                    "stops": [
+                        {"stop": names[stop], "travel_time_to_next": travel, "expected_daily_passengers": demand}
+                        for stop, travel, demand in zip(route.stops, route.travel_times, route.demand)
+                    ],
+                }
+                for route in self.routes
+            ],
+        }
+
+
+# === Loaders ===
+def load_json(path, depot=None):
+    """{"depot": ..., "routes": [...]} in the shape Network takes"""
+    with open(path) as f:
+        data = json.load(f)
+    return Network(data["routes"], depot if depot is not None else data.get("depot"))
+
+
+def load_csv(path, depot=None):
+    """One row per route stop: route, topology, sequence, stop, travel_time_to_next, expected_daily_passengers"""
+    routes = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            route = routes.setdefault(row["route"], {"name": row["route"], "topology": row.get("topology") or "out_and_back",
+                                                     "stops": []})
+            route["stops"].append((int(row["sequence"]), {
+                "stop": row["stop"],
+                "travel_time_to_next": float(row.get("travel_time_to_next") or 0),
+                "expected_daily_passengers": float(row.get("expected_daily_passengers") or 0),
+            }))
+    for route in routes.values():
+        route["stops"] = [stop for _, stop in sorted(route["stops"], key=lambda item: item[0])]
+    return Network(list(routes.values()), depot)
+
+
+def _gtfs_minutes(value):
+    hours, minutes, seconds = (int(part) for part in value.split(":"))
+    return hours * 60 + minutes + seconds / 60
+
+
+def _read_gtfs(directory, name):
+    with open(os.path.join(directory, name), newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
+
+
+def load_gtfs(directory, depot=None, default_demand=0):
+    """Build a network from a GTFS feed directory (routes, trips, stop_times and stops .txt)
+
+    Each route is modelled on its first direction-0 trip: a trip that ends where it
+    started is a loop, anything else runs out and back. Travel times come from the
+    stop_times arrival times. GTFS has no demand, so an optional demand.txt
+    (stop_id, expected_daily_passengers) fills it in, else every stop gets `default_demand`.
+    """
+    stop_names = {row["stop_id"]: row["stop_name"] for row in _read_gtfs(directory, "stops.txt")}
+    demand = defaultdict(lambda: default_demand)
+    if os.path.exists(os.path.join(directory, "demand.txt")):
+        for row in _read_gtfs(directory, "demand.txt"):
+            demand[row["stop_id"]] = float(row["expected_daily_passengers"])
+
+    trip_routes = {}
+    for trip in _read_gtfs(directory, "trips.txt"):
+        if trip.get("direction_id", "0") in ("", "0"):
+            trip_routes.setdefault(trip["route_id"], trip["trip_id"])
+    trip_stops = defaultdict(list)
+    for row in _read_gtfs(directory, "stop_times.txt"):
+        trip_stops[row["trip_id"]].append((int(row["stop_sequence"]), row["stop_id"], _gtfs_minutes(row["arrival_time"])))
+
+    routes = []
+    for route in _read_gtfs(directory, "routes.txt"):
+        trip = trip_routes.get(route["route_id"])
+        if trip is None:
+            continue
+        sequence = sorted(trip_stops[trip])
+        topology = "out_and_back"
+        if len(sequence) > 2 and sequence[0][1] == sequence[-1][1]:
+            topology = "loop"  # the closing stop becomes the last stop's travel time back to the first
+        times = [later[2] - earlier[2] for earlier, later in zip(sequence, sequence[1:])]
+        if topology == "loop":
+            sequence = sequence[:-1]
+        else:
+            times.append(0)
+        routes.append({
+            "name": route.get("route_short_name") or route["route_id"],
+            "topology": topology,
+            "stops": [
+                {"stop": stop_names[stop_id], "travel_time_to_next": travel, "expected_daily_passengers": demand[stop_id]}
+                for (_, stop_id, _), travel in zip(sequence, times)
+            ],
+        })
+    return Network(routes, depot)
+
+
+def load_network(path, depot=None):
+    """Load a network from a .json or .csv file or a GTFS feed directory"""
+    if os.path.isdir(path):
+        return load_gtfs(path, depot)
+    if path.endswith(".json"):
+        return load_json(path, depot)
+    if path.endswith(".csv"):
+        return load_csv(path, depot)
+    raise ValueError(f"Unsupported network file: {path}")
+
+
+def synthetic_network(route_count, stops_per_route=10, seed=0):
+    """A city-sized test network: every route leaves the shared depot, a third of them are loops"""
+    rng = random.Random(seed)
+    routes = []
+    for r in range(route_count):
+        stops = [{"stop": "Depot", "travel_time_to_next": rng.randint(2, 8), "expected_daily_passengers": 10}]
+        for s in range(1, stops_per_route):
+            # The middle stops are transfer points shared with the neighbouring routes
+            name = f"Transfer {r}" if s == stops_per_route // 2 else f"Route {r} stop {s}"
+            if s == stops_per_route // 2 + 1 and r > 0:
+                name = f"Transfer {r - 1}"
+            stops.append({"stop": name, "travel_time_to_next": rng.randint(2, 8),
+                          "expected_daily_passengers": rng.randint(10, 60)})
+        topology = "loop" if r % 3 == 0 else "out_and_back"
+        if topology == "out_and_back":
+            stops[-1]["travel_time_to_next"] = 0
+        routes.append({"name": f"R{r + 1}", "topology": topology, "stops": stops})
+    return Network(routes, "Depot")
@@ -0,0 +1,202 @@
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from replications import _run_batch, replication_seeds
+from sim import DEFAULT_SCHEDULE, make_config
+
+# === Search space ===
+# Keys are config parameters, or "schedule.<block label>.<field>" for a fleet block field
+DEFAULT_SPACE = {
+    "schedule.OffPeak-AM.red": [1, 2, 3],
+    "schedule.OffPeak-AM.blue": [1, 2],
+    "schedule.Peak-AM.red": [0, 1, 2, 3],
+    "schedule.Peak-AM.blue": [0, 1, 2],
+    "schedule.Peak-AM.duration": [120, 180, 240, 300],
+    "schedule.Peak-PM.red": [0, 1, 2, 3],
+    "schedule.Peak-PM.blue": [0, 1, 2],
+    "schedule.Peak-PM.duration": [120, 180, 240],
+    "robots_in_warehouse": [36, 72, 108],
+    "bus_passenger_capacity": [16, 22, 30],
+    "bus_robot_capacity": [8, 12, 16],
+}
+
+
+def apply_params(params, base=None):
+    """Turn a point of the search space into config overrides"""
+    overrides = dict(base or {})
+    schedule = copy.deepcopy(overrides.get("schedule", DEFAULT_SCHEDULE))
+    blocks = {block["label"]: block for block in schedule}
+    for key, value in params.items():
+        if key.startswith("schedule."):
+            _, label, field = key.split(".", 2)
+            if label not in blocks:
+                raise ValueError(f"Unknown schedule block: {label}")
+            blocks[label][field] = value
+        else:
+            overrides[key] = value
+    overrides["schedule"] = schedule
+    make_config(overrides)  # validate early, before fanning out to workers
+    return overrides
+
+
+def sample_candidates(space, count, rng):
+    """Draw up to `count` distinct points from the space"""
+    keys = sorted(space)
+    total = 1
+    for key in keys:
+        total *= len(space[key])
+    if total <= count:
+        return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+    seen = set()
+    candidates = []
+    while len(candidates) < count:
+        values = tuple(rng.choice(space[key]) for key in keys)
+        if values not in seen:
+            seen.add(values)
+            candidates.append(dict(zip(keys, values)))
+    return candidates
+
+
+class Candidate:
+    """A configuration under evaluation and the replications it has received so far"""
+
+    def __init__(self, params, base=None):
+        self.params = params
+        self.config = apply_params(params, base)
+        self.profits = []
+        self.service_rates = []
+
+    def record(self, metrics):
+        self.profits.append(metrics["net_profit"])
+        self.service_rates.append(metrics["service_rate"])
+
+    @property
+    def profit(self):
+        return float(np.mean(self.profits))
+
+    @property
+    def service_rate(self):
+        return float(np.mean(self.service_rates))
+
+    def score(self, min_service_rate):
+        """Sort key: feasible configurations first, then by mean profit"""
+        return (self.service_rate >= min_service_rate, self.profit)
+
+    def as_dict(self):
+        return {
+            "params": self.params,
+            "replications": len(self.profits),
+            "net_profit": self.profit,
+            "net_profit_std": float(np.std(self.profits, ddof=1)) if len(self.profits) > 1 else 0.0,
+            "service_rate": self.service_rate,
+        }
+
+
+def _evaluate(candidates, seeds, target, pool, cache_dir=None):
+    """Bring every candidate up to `target` replications on the shared seed list"""
+    jobs = []
+    for c_index, candidate in enumerate(candidates):
+        missing = list(enumerate(seeds[len(candidate.profits):target], len(candidate.profits)))
+        if missing:
+            jobs.append((c_index, missing))
+
+    if pool is None:
+        results = [_run_batch(candidates[c].config, batch, cache_dir) for c, batch in jobs]
+    else:
+        results = list(pool.map(_run_batch, [candidates[c].config for c, _ in jobs], [batch for _, batch in jobs],
+                                [cache_dir] * len(jobs)))
+
+    for (c_index, _), batch_result in zip(jobs, results):
+        # Batches come back in seed order, so every candidate sees seed k as its k-th sample
+        for _, metrics in batch_result:
+            candidates[c_index].record(metrics)
+
+
+def successive_halving(space=None, candidates=81, eta=3, min_replications=2, max_replications=None,
+                       min_service_rate=0.95, seed=0, base=None, workers=None, keep=5, on_round=None, cache_dir=None):
+    """Search the space for the most profitable configurations meeting the service-rate floor
+
+    Every round evaluates the survivors on the same seeds (common random numbers), keeps
+    the best 1/eta of them and multiplies their replication budget by eta, so most of the
+    compute goes to the few configurations that are actually competitive.
+    """
+    space = space or DEFAULT_SPACE
+    rng = random.Random(seed)
+    survivors = [Candidate(params, base) for params in sample_candidates(space, candidates, rng)]
+    evaluated = list(survivors)
+
+    rounds = 0
+    n = len(survivors)
+    while n > 1:
+        n //= eta
+        rounds += 1
+    max_replications = max_replications or min_replications * eta ** rounds
+    seeds = replication_seeds(seed, max_replications)
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    history = []
+    try:
+        target = min_replications
+        while True:
+            _evaluate(survivors, seeds, target, pool, cache_dir)
+            survivors.sort(key=lambda c: c.score(min_service_rate), reverse=True)
+            history.append({"replications": target, "candidates": len(survivors)})
+            if on_round:
+                on_round(history[-1], survivors)
+            if len(survivors) <= keep or target >= max_replications:
+                break
+            survivors = survivors[:max(keep, len(survivors) // eta)]
+            target = min(target * eta, max_replications)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return {
+        "min_service_rate": min_service_rate,
+        "rounds": history,
+        "simulations": sum(len(c.profits) for c in evaluated),
+        "best": [dict(c.as_dict(), feasible=c.service_rate >= min_service_rate) for c in survivors[:keep]],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fleet-schedule search by successive halving")
+    parser.add_argument("--space", help="JSON file mapping parameters to candidate values")
+    parser.add_argument("--candidates", type=int, default=81)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-replications", type=int, default=2)
+    parser.add_argument("--max-replications", type=int, default=None)
+    parser.add_argument("--min-service-rate", type=float, default=0.95)
+    parser.add_argument("--keep", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", "-j", type=int, default=None)
+    parser.add_argument("--cache", help="directory of cached results to reuse and extend")
+    args = parser.parse_args()
+
+    space = None
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+
+    def report(round_info, survivors):
+        best = survivors[0]
+        print(f"{round_info['candidates']:>4} candidates x {round_info['replications']:>3} reps | "
+              f"best €{best.profit:.2f} at {best.service_rate*100:.1f}% service")
+
+    result = successive_halving(space, args.candidates, args.eta, args.min_replications, args.max_replications,
+                                args.min_service_rate, args.seed, workers=args.workers, keep=args.keep,
+                                on_round=report, cache_dir=args.cache)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
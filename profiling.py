@@ -0,0 +1,114 @@
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Opt-in instrumentation of one run: steps and wall time per process kind and per simulated hour
+
+    Every process step (one resume of a SimPy process, from one yield to the next) is
+    timed and counted under its process kind. Wall time outside the steps is SimPy's own
+    scheduling. With `trace` set every step is also kept for a Chrome trace / speedscope
+    export.
+    """
+
+    def __init__(self, trace=False):
+        self.steps = Counter()
+        self.step_time = defaultdict(float)
+        self.hour_time = {}
+        self.spans = defaultdict(float)
+        self.run_time = 0.0
+        self.trace = [] if trace else None
+        self.origin = time.perf_counter()
+        self.monitoring = False
+
+    def wrap(self, kind, process):
+        """Drive the generator `process`, timing each of its steps"""
+        clock = time.perf_counter
+        steps, step_time, trace = self.steps, self.step_time, self.trace
+        value, error = None, None
+        while True:
+            started = clock()
+            try:
+                event = process.throw(error) if error is not None else process.send(value)
+            except StopIteration:
+                event = None
+            ended = clock()
+            steps[kind] += 1
+            step_time[kind] += ended - started
+            if trace is not None:
+                trace.append((kind, started, ended))
+            if event is None:
+                return
+            try:
+                value, error = (yield event), None
+            except BaseException as exc:
+                value, error = None, exc
+
+    def monitor(self, env):
+        """Record the wall time spent on every simulated hour"""
+        self.monitoring = True
+        while True:
+            hour = int(env.now // 60)
+            started = time.perf_counter()
+            yield env.timeout(60 - env.now % 60)
+            self.hour_time[hour] = self.hour_time.get(hour, 0.0) + time.perf_counter() - started
+
+    @contextmanager
+    def span(self, name):
+        """Time a block outside the event loop (analytics, reporting)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            self.spans[name] += ended - started
+            if self.trace is not None:
+                self.trace.append((name, started, ended))
+
+    # === Results ===
+    def summary(self):
+        stepped = sum(self.step_time.values())
+        return {
+            "steps": dict(self.steps),
+            "step_time": dict(self.step_time),
+            "scheduling_time": max(self.run_time - stepped, 0.0),
+            "run_time": self.run_time,
+            "hour_time": dict(self.hour_time),
+            "spans": dict(self.spans),
+        }
+
+    def report(self):
+        """The summary as a printable table"""
+        lines = [f"{'Process':<26} | {'Steps':>8} | {'Wall (ms)':>10} | {'Share':>6} | {'µs/step':>8}", "-" * 70]
+        run_time = self.run_time or sum(self.step_time.values()) or 1.0
+        for kind, seconds in sorted(self.step_time.items(), key=lambda item: -item[1]):
+            steps = self.steps[kind]
+            lines.append(f"{kind:<26} | {steps:>8} | {seconds * 1000:>10.1f} | {seconds / run_time:>6.1%} | "
+                         f"{seconds / steps * 1e6:>8.1f}")
+        scheduling = self.summary()["scheduling_time"]
+        lines.append(f"{'(simpy scheduling)':<26} | {'':>8} | {scheduling * 1000:>10.1f} | {scheduling / run_time:>6.1%} |")
+        for name, seconds in self.spans.items():
+            lines.append(f"{name:<26} | {'':>8} | {seconds * 1000:>10.1f} | {'':>6} |")
+
+        if self.hour_time:
+            slowest = sorted(self.hour_time.items(), key=lambda item: -item[1])[:3]
+            lines.append("\nSlowest simulated hours: " + ", ".join(
+                f"hour {hour} ({seconds * 1000:.1f} ms)" for hour, seconds in slowest))
+        return "\n".join(lines)
+
+    def export_trace(self, path):
+        """Write the recorded steps as Chrome trace events (chrome://tracing, Perfetto, speedscope)"""
+        if self.trace is None:
+            raise ValueError("Profiler was created without trace=True")
+        lanes = {}
+        events = []
+        for name, started, ended in self.trace:
+            tid = lanes.setdefault(name, len(lanes) + 1)
+            events.append({"name": name, "ph": "X", "pid": 1, "tid": tid,
+                           "ts": (started - self.origin) * 1e6, "dur": (ended - started) * 1e6})
+        events.extend({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+                      for name, tid in lanes.items())
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,212 @@
+import math
+from array import array
+
+import numpy as np
+
+NAN = float("nan")
+
+ROUTE_COLOURS = ("red", "blue")
+PACKAGE_STATUSES = ("waiting_in_warehouse", "onboard", "delivered")
+WAITING, ONBOARD, DELIVERED = range(len(PACKAGE_STATUSES))
+
+
+class NameIndex:
+    """Interns names (stops, buses) to small integer ids"""
+
+    def __init__(self, names=()):
+        self.names = []
+        self.ids = {}
+        for name in names:
+            self.intern(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def intern(self, name):
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+
+class RecordTable:
+    """Struct-of-arrays record storage: one typed array per column, grown in chunks
+
+    Subclasses list their COLUMNS as (name, typecode, default). Rows are plain ints, so
+    queues and buses hold small integers instead of dicts; `column()` hands analysis
+    code a NumPy copy of the filled part of a column. In streaming runs finished rows
+    are `release()`d and reused, so the table only ever holds what is in flight.
+    """
+
+    COLUMNS = ()
+    CHUNK = 4096
+
+    def __init__(self, stops, routes=ROUTE_COLOURS):
+        self.stops = stops
+        self.routes = routes
+        self.size = 0
+        self._allocated = 0
+        self._free = []
+        self._chunks = {}
+        for name, typecode, default in self.COLUMNS:
+            setattr(self, name, array(typecode))
+            self._chunks[name] = array(typecode, [default]) * self.CHUNK
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        return (self.view(row) for row in range(self.size))
+
+    def _new_row(self):
+        if self._free:
+            return self._free.pop()
+        if self.size == self._allocated:
+            for name, _, _ in self.COLUMNS:
+                getattr(self, name).extend(self._chunks[name])
+            self._allocated += self.CHUNK
+        row = self.size
+        self.size += 1
+        return row
+
+    def release(self, row):
+        """Reset a finished row to its defaults and hand it out again on the next add"""
+        for name, _, default in self.COLUMNS:
+            getattr(self, name)[row] = default
+        self._free.append(row)
+
+    @property
+    def live(self):
+        return self.size - len(self._free)
+
+    def column(self, name):
+        return np.frombuffer(getattr(self, name)[:self.size], dtype=getattr(self, name).typecode)
+
+    def view(self, row):
+        return self.VIEW(self, row)
+
+    def nbytes(self):
+        return sum(getattr(self, name).itemsize * self._allocated for name, _, _ in self.COLUMNS)
+
+
+# === Object views ===
+class PassengerView:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    origin = property(lambda self: self.table.stops.names[self.table.origin[self.row]])
+    destination = property(lambda self: self.table.stops.names[self.table.destination[self.row]])
+    route_colour = property(lambda self: self.table.routes[self.table.route[self.row]])
+    arrival_time = property(lambda self: self.table.arrival_time[self.row])
+    pickup_time = property(lambda self: self.table.pickup_time[self.row])
+    dropoff_time = property(lambda self: self.table.dropoff_time[self.row])
+    wait_time = property(lambda self: self.pickup_time - self.arrival_time)
+    travel_time = property(lambda self: self.dropoff_time - self.pickup_time)
+    served = property(lambda self: not math.isnan(self.dropoff_time))
+
+
+class PackageView:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    delivery_stop = property(lambda self: self.table.stops.names[self.table.delivery_stop[self.row]])
+    route_colour = property(lambda self: self.table.routes[self.table.route_colour[self.row]])
+    arrival_time = property(lambda self: self.table.arrival_time[self.row])
+    pickup_time = property(lambda self: self.table.pickup_time[self.row])
+    delivery_time = property(lambda self: self.table.delivery_time[self.row])
+    status = property(lambda self: PACKAGE_STATUSES[self.table.status[self.row]])
+
+
+class BusStateView:
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    bus_id = property(lambda self: self.table.buses.names[self.table.bus[self.row]])
+    time = property(lambda self: self.table.time[self.row])
+    stop = property(lambda self: self.table.stops.names[self.table.stop[self.row]])
+    passengers = property(lambda self: self.table.passengers[self.row])
+    capacity = property(lambda self: self.table.capacity[self.row])
+    utilization = property(lambda self: self.passengers / self.capacity)
+    picked_up = property(lambda self: self.table.picked_up[self.row])
+    dropped_off = property(lambda self: self.table.dropped_off[self.row])
+    robots = property(lambda self: self.table.robots[self.row])
+
+
+# === Tables ===
+class PassengerTable(RecordTable):
+    COLUMNS = (
+        ("origin", "h", 0),
+        ("destination", "h", 0),
+        ("route", "h", 0),
+        ("arrival_time", "d", NAN),
+        ("pickup_time", "d", NAN),
+        ("dropoff_time", "d", NAN),
+    )
+    VIEW = PassengerView
+
+    def add(self, origin, destination, route, arrival_time):
+        row = self._new_row()
+        self.origin[row] = origin
+        self.destination[row] = destination
+        self.route[row] = route
+        self.arrival_time[row] = arrival_time
+        return row
+
+
+class PackageTable(RecordTable):
+    COLUMNS = (
+        ("delivery_stop", "h", 0),
+        ("route_colour", "h", 0),
+        ("status", "b", WAITING),
+        ("arrival_time", "d", NAN),
+        ("pickup_time", "d", NAN),
+        ("delivery_time", "d", NAN),
+    )
+    VIEW = PackageView
+
+    def add(self, delivery_stop, route_colour, arrival_time):
+        row = self._new_row()
+        self.delivery_stop[row] = delivery_stop
+        self.route_colour[row] = route_colour
+        self.arrival_time[row] = arrival_time
+        return row
+
+
+class BusStateTable(RecordTable):
+    COLUMNS = (
+        ("bus", "h", 0),
+        ("stop", "h", 0),
+        ("passengers", "h", 0),
+        ("capacity", "h", 0),
+        ("picked_up", "h", 0),
+        ("dropped_off", "h", 0),
+        ("robots", "h", 0),
+        ("time", "d", NAN),
+    )
+    VIEW = BusStateView
+
+    def __init__(self, stops, buses, routes=ROUTE_COLOURS):
+        super().__init__(stops, routes)
+        self.buses = buses
+
+    def add(self, bus, time, stop, passengers, capacity, picked_up, dropped_off, robots):
+        row = self._new_row()
+        self.bus[row] = bus
+        self.time[row] = time
+        self.stop[row] = stop
+        self.passengers[row] = passengers
+        self.capacity[row] = capacity
+        self.picked_up[row] = picked_up
+        self.dropped_off[row] = dropped_off
+        self.robots[row] = robots
+        return row
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from result_cache import ResultCache
+from sim import run_simulation
+
+# === Metrics collected per replication ===
+METRICS = {
+    "service_rate": lambda summary: summary["service_rate"],
+    "average_wait": lambda summary: summary["average_wait"],
+    "passengers_served": lambda summary: summary["passengers_served"],
+    "packages_delivered": lambda summary: summary["packages_delivered"],
+    "average_utilization": lambda summary: summary["bus_utilization"].get("average_utilization", 0.0),
+    "net_profit": lambda summary: summary["financials"]["net_profit"],
+}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+Z_95 = 1.959964  # normal approximation, fine for the replication counts we run
+
+
+def replication_seeds(master_seed, count):
+    """Independent per-replication seeds spawned from one master seed"""
+    children = np.random.SeedSequence(master_seed).spawn(count)
+    return [int.from_bytes(child.generate_state(4).tobytes(), "little") for child in children]
+
+
+def summarize_replication(summary):
+    """Reduce a run summary to the scalar metrics we aggregate"""
+    return {name: float(extract(summary)) for name, extract in METRICS.items()}
+
+
+def _run_batch(config, batch, cache_dir=None):
+    """Worker entry point: run a batch of (index, seed) replications"""
+    cache = ResultCache(cache_dir) if cache_dir else None
+    return [(index, summarize_replication(run_simulation(config, seed, cache=cache))) for index, seed in batch]
+
+
+def aggregate(samples):
+    """Mean, 95% CI and percentiles for each metric column"""
+    result = {}
+    for name, values in samples.items():
+        n = len(values)
+        mean = float(np.mean(values))
+        std = float(np.std(values, ddof=1)) if n > 1 else 0.0
+        half_width = Z_95 * std / np.sqrt(n) if n > 1 else 0.0
+        result[name] = {
+            "mean": mean,
+            "std": std,
+            "ci95": [mean - half_width, mean + half_width],
+            "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        }
+    return result
+
+
+def run_samples(config=None, replications=1000, master_seed=0, workers=None, batch_size=None, on_progress=None,
+                cache_dir=None):
+    """Run seeded replications across a process pool: one array of per-replication values per metric
+
+    Results are slotted by replication index as they arrive, so the samples only depend
+    on `master_seed` and `replications`, never on worker count or timing. With
+    `cache_dir` every replication goes through a ResultCache there.
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = list(enumerate(replication_seeds(master_seed, replications)))
+    samples = {name: np.full(replications, np.nan) for name in METRICS}
+
+    def collect(batch_result):
+        for index, metrics in batch_result:
+            for name, value in metrics.items():
+                samples[name][index] = value
+
+    if workers == 1:
+        for done, item in enumerate(seeds, 1):
+            collect(_run_batch(config, [item], cache_dir))
+            if on_progress:
+                on_progress(done, replications)
+    else:
+        # A few batches per worker keeps IPC overhead low while still balancing load
+        batch_size = batch_size or max(1, replications // (workers * 4))
+        batches = [seeds[i:i + batch_size] for i in range(0, replications, batch_size)]
+        done = 0
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_run_batch, config, batch, cache_dir) for batch in batches]
+            for future in as_completed(futures):
+                batch_result = future.result()
+                collect(batch_result)
+                done += len(batch_result)
+                if on_progress:
+                    on_progress(done, replications)
+    return samples
+
+
+def run_replications(config=None, replications=1000, master_seed=0, workers=None, batch_size=None, on_progress=None,
+                     cache_dir=None):
+    """Run seeded replications and aggregate their metrics"""
+    samples = run_samples(config, replications, master_seed, workers, batch_size, on_progress, cache_dir)
+    return {
+        "replications": replications,
+        "master_seed": master_seed,
+        "metrics": aggregate(samples),
+    }
+
+
+def compare_scenarios(baseline=None, alternative=None, replications=100, master_seed=0, workers=None,
+                      cache_dir=None):
+    """Paired comparison of two configs run on the same seeds: alternative minus baseline, per metric
+
+    With random streams (the default) both scenarios see the same arrivals, packages and
+    dwell times on a seed, so the per-seed differences vary far less than either run.
+    `variance_reduction` is the variance of the difference had the runs been independent
+    over the paired variance: how many times fewer replications pairing needs for the
+    same confidence interval.
+    """
+    base = run_samples(baseline, replications, master_seed, workers, cache_dir=cache_dir)
+    other = run_samples(alternative, replications, master_seed, workers, cache_dir=cache_dir)
+    result = {}
+    for name in METRICS:
+        delta = other[name] - base[name]
+        mean = float(np.mean(delta))
+        paired_var = float(np.var(delta, ddof=1)) if replications > 1 else 0.0
+        independent_var = float(np.var(base[name], ddof=1) + np.var(other[name], ddof=1)) if replications > 1 else 0.0
+        half_width = Z_95 * np.sqrt(paired_var / replications)
+        result[name] = {
+            "baseline": float(np.mean(base[name])),
+            "alternative": float(np.mean(other[name])),
+            "delta": mean,
+            "ci95": [mean - half_width, mean + half_width],
+            "independent_ci95": [mean - Z_95 * np.sqrt(independent_var / replications),
+                                 mean + Z_95 * np.sqrt(independent_var / replications)],
+            "variance_reduction": independent_var / paired_var if paired_var else float("inf"),
+        }
+    return {
+        "replications": replications,
+        "master_seed": master_seed,
+        "metrics": result,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo replications of the mothership simulation")
+    parser.add_argument("--replications", "-n", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--config", help="JSON file with config overrides")
+    parser.add_argument("--cache", help="directory of cached results to reuse and extend")
+    parser.add_argument("--compare", help="JSON file with the overrides of a scenario to compare against --config")
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config) as f:
+            config = json.load(f)
+
+    if args.compare:
+        with open(args.compare) as f:
+            alternative = {**(config or {}), **json.load(f)}
+        result = compare_scenarios(config, alternative, args.replications, args.seed, args.workers, args.cache)
+    else:
+        result = run_replications(config, args.replications, args.seed, args.workers, cache_dir=args.cache)
+    print(json.dumps(result, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
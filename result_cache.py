@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+from sim import MothershipSimulation, compute_financials, make_config, resolve_network
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "mothership")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Config keys only compute_financials reads: changing them reprices a cached run instead of rerunning it
+FINANCIAL_KEYS = ("cost_per_bus_per_minute", "cost_per_robot_delivery", "cost_fixed_overhead",
+                  "revenue_per_passenger", "revenue_per_package")
+# Config keys that change how a run is observed, not what happens in it
+IGNORED_KEYS = ("profile",)
+# Modules whose source decides a run's results; editing any of them invalidates the cache
+CODE_MODULES = ("sim", "analytics", "arrivals", "fleet", "metrics", "network", "records", "streams", "warehouse")
+
+_code_version = None
+
+
+def code_version():
+    """Hash of the simulation's source files"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for name in CODE_MODULES:
+            with open(sys.modules[name].__file__, "rb") as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def _canonical(value):
+    if callable(value):
+        return f"{value.__module__}.{value.__qualname__}"
+    raise TypeError(f"Cannot hash config value {value!r}")
+
+
+def cache_key(config, seed):
+    """Content hash of everything that decides a run's counts: config (costs aside), network, seed and code"""
+    config = make_config(config)
+    params = {key: value for key, value in config.items() if key not in FINANCIAL_KEYS + IGNORED_KEYS}
+    params["network"] = resolve_network(config["network"]).as_dict()
+    document = json.dumps({"config": params, "seed": seed, "code": code_version()},
+                          sort_keys=True, separators=(",", ":"), default=_canonical)
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+class ResultCache:
+    """On-disk cache of finished runs, keyed by cache_key and evicted least recently used first
+
+    Each entry is one pickle file holding the run's summary, its analytics and the counts
+    the financials come from; a hit prices those counts under the caller's costs. A hit
+    touches the file, so modification times order the entries for eviction once the
+    directory grows past `max_bytes` or `max_entries`. Runs without a seed are not cached,
+    nor are runs that export their records, since a hit would write no records.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, max_entries=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def lookup(self, config, seed):
+        """The cached entry for this run with its financials under `config`, or None"""
+        if seed is None or make_config(config)["export"]:
+            return None
+        path = self._path(cache_key(config, seed))
+        try:
+            with open(path, "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+
+        config = make_config(config)
+        counts = entry["counts"]
+        financials = compute_financials(config, counts["bus_minutes"], counts["passengers_served"],
+                                        counts["packages_delivered"], config["days"])
+        entry["summary"] = {**entry["summary"], "financials": financials, "cached": True}
+        return entry
+
+    def store(self, sim, analytics=None):
+        """Save a finished simulation's results"""
+        if sim.seed is None or sim.config["export"]:
+            return
+        analytics = analytics or sim.analytics()
+        entry = {
+            "summary": sim.summary(analytics),
+            "analytics": analytics,
+            "counts": {
+                "bus_minutes": analytics["buses"]["bus_minutes"],
+                "passengers_served": analytics["passengers"]["served"],
+                "packages_delivered": analytics["packages"]["delivered"],
+            },
+        }
+        path = self._path(cache_key(sim.config, sim.seed))
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, "wb") as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(partial, path)  # readers never see half an entry
+        self.evict()
+
+    def run(self, config=None, seed=None):
+        """The run's summary, from the cache when it is there, else simulated and stored"""
+        entry = self.lookup(config, seed)
+        if entry is not None:
+            return entry["summary"]
+        sim = MothershipSimulation(config, seed)
+        summary = sim.run()
+        self.store(sim)
+        return summary
+
+    # === Housekeeping ===
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first"""
+        result = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue  # evicted by another process meanwhile
+                result.append((stat.st_mtime, stat.st_size, path))
+        return sorted(result)
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes and (self.max_entries is None or count <= self.max_entries):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            count -= 1
+
+    def clear(self):
+        for _, _, path in self.entries():
+            os.remove(path)
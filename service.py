@@ -0,0 +1,420 @@
+"""Scenario service: an asyncio HTTP/JSON front end queueing simulation runs onto warm worker processes
+
+    POST /jobs             {"config": {...}, "seed": 0}, or {"scenarios": [{...}, ...]} for a batch,
+                           sent as Content-Type: application/json
+                           -> 202 {"jobs": [id, ...]}; 503 when the queue is full or no worker is left
+    GET  /jobs/<id>        status, latest progress, and the summary once done
+    GET  /jobs/<id>/events progress as newline-delimited JSON, ending with the result
+    GET  /health           workers, queue depth and job counts
+
+Run: python service.py [--port 8080] [--workers 2]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import time
+from collections import deque
+from http import HTTPStatus
+
+from analytics import DAY_MINUTES
+from sim import MothershipSimulation, make_config
+
+PROGRESS_EVERY = 60  # simulated minutes between progress reports
+MAX_BODY = 16 * 1024 * 1024
+# Config keys naming files on the service's machine; scenarios come from HTTP clients and may not use them
+PATH_KEYS = ("export",)
+
+
+# === Worker processes ===
+def _report_progress(sim, conn, job_id, started):
+    """A SimPy process sending the run's simulated time and speed to the service"""
+    env = sim.env
+    end = (sim.config["days"] - 1) * DAY_MINUTES + sim.config["sim_time"] + 60
+    while True:
+        yield env.timeout(PROGRESS_EVERY)
+        elapsed = time.perf_counter() - started
+        conn.send(("progress", job_id, {
+            "sim_time": env.now,
+            "day": int(env.now // DAY_MINUTES) + 1,
+            "fraction": min(env.now / end, 1.0),
+            "events_per_second": sim.events / elapsed if elapsed else 0.0,
+        }))
+
+
+def _worker(conn):
+    """Worker main loop: run each batch of (job id, config, seed) it is sent, reporting as it goes
+
+    The model is imported once when the worker starts, so a job only pays for its run.
+    """
+    conn.send(("ready", None, None))
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            return
+        for job_id, config, seed in batch:
+            conn.send(("started", job_id, None))
+            try:
+                sim = MothershipSimulation(config, seed)
+                sim.start()
+                sim.env.process(_report_progress(sim, conn, job_id, time.perf_counter()))
+                conn.send(("done", job_id, sim.run()))
+            except Exception as exc:
+                conn.send(("failed", job_id, f"{type(exc).__name__}: {exc}"))
+
+
+def _json_default(value):
+    if hasattr(value, "item"):  # NumPy scalars
+        return value.item()
+    return str(value)
+
+
+def dumps(value):
+    return json.dumps(value, default=_json_default)
+
+
+# === Service ===
+class Job:
+    __slots__ = ("id", "config", "seed", "status", "progress", "result", "error", "submitted", "started", "finished",
+                 "listeners")
+
+    def __init__(self, job_id, config, seed):
+        self.id = job_id
+        self.config = config
+        self.seed = seed
+        self.status = "queued"
+        self.progress = None
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.listeners = []  # asyncio.Queues of /events streams
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "seed": self.seed,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "queued_seconds": (self.started or time.time()) - self.submitted,
+            "run_seconds": (self.finished or time.time()) - self.started if self.started else None,
+        }
+
+    def publish(self, event):
+        for listener in self.listeners:
+            listener.put_nowait(event)
+
+
+class Worker:
+    __slots__ = ("process", "conn", "batch")
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.batch = set()  # ids of the jobs it is running
+
+
+class ScenarioService:
+    """Job queue, worker pool and HTTP front end
+
+    Jobs wait in a bounded FIFO; an idle worker is handed up to `batch_size` of them in
+    one message, so a burst of small scenarios costs one round trip per batch rather than
+    per job. Workers are spawned once and reused for every job; one that dies is replaced.
+    """
+
+    def __init__(self, workers=2, max_queue=1000, batch_size=4, keep_jobs=10000):
+        self.worker_count = workers
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.keep_jobs = keep_jobs
+        self.workers = []
+        self.queue = deque()
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._context = multiprocessing.get_context("spawn")
+        self._starting = set()  # replacement workers still importing
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8080):
+        started = await asyncio.gather(*(self._start_worker() for _ in range(self.worker_count)))
+        if None in started:
+            await self.stop()
+            raise RuntimeError("A worker process exited on start")
+        self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def _start_worker(self):
+        """Spawn a worker and add it to the pool once it is ready; None if it exits first"""
+        loop = asyncio.get_running_loop()
+        parent, child = self._context.Pipe()
+        process = self._context.Process(target=_worker, args=(child,), daemon=True)
+        process.start()
+        child.close()
+        try:
+            await loop.run_in_executor(None, parent.recv)  # wait for its imports, so its first jobs start warm too
+        except (EOFError, OSError):
+            parent.close()
+            await loop.run_in_executor(None, process.join)
+            return None
+        worker = Worker(process, parent)
+        self.workers.append(worker)
+        loop.add_reader(parent.fileno(), self._receive, worker)
+        self._dispatch()
+        return worker
+
+    async def _replace_worker(self):
+        if await self._start_worker() is None:
+            self._starting.discard(asyncio.current_task())
+            if not self.workers and not self._starting:  # nothing left to run the queue
+                self._fail_queued("No worker process left")
+
+    async def stop(self):
+        loop = asyncio.get_running_loop()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        await asyncio.gather(*self._starting)
+        for worker in self.workers:
+            loop.remove_reader(worker.conn.fileno())
+            worker.conn.send(None)
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, 5)
+            worker.conn.close()
+        self.workers = []
+
+    # === Jobs ===
+    def submit(self, scenarios):
+        """Queue (config, seed) scenarios
+
+        Raises ValueError on a bad config or one naming a file (an export directory, a
+        network file), OverflowError when the queue is full and RuntimeError when no
+        worker is left to run them.
+        """
+        if not self.workers and not self._starting:
+            raise RuntimeError("No worker process left")
+        if len(self.queue) + len(scenarios) > self.max_queue:
+            raise OverflowError(f"Queue full ({len(self.queue)} of {self.max_queue} waiting)")
+        for config, _ in scenarios:
+            make_config(config)  # reject unknown keys now rather than in a worker
+            for key in PATH_KEYS:
+                if config.get(key):
+                    raise ValueError(f"{key!r} is not available through the service")
+            if isinstance(config.get("network"), str):
+                raise ValueError("A network must be given inline, not as a file path")
+        jobs = []
+        for config, seed in scenarios:
+            job = Job(next(self._ids), config, seed)
+            self.jobs[job.id] = job
+            self.queue.append(job)
+            jobs.append(job)
+        self._forget_old_jobs()
+        self._dispatch()
+        return jobs
+
+    def _forget_old_jobs(self):
+        if len(self.jobs) <= self.keep_jobs:
+            return
+        for job_id in [job.id for job in self.jobs.values() if job.done][:len(self.jobs) - self.keep_jobs]:
+            del self.jobs[job_id]
+
+    def _dispatch(self):
+        for worker in self.workers:
+            if not self.queue:
+                return
+            if worker.batch:
+                continue
+            batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            for job in batch:
+                job.status = "running"
+                worker.batch.add(job.id)
+            worker.conn.send([(job.id, job.config, job.seed) for job in batch])
+
+    def _receive(self, worker):
+        try:
+            kind, job_id, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+            self._fail_worker(worker)
+            return
+        job = self.jobs.get(job_id)
+        if kind == "started":
+            if job:
+                job.started = time.time()
+            return
+        if kind == "progress":
+            if job:
+                job.progress = payload
+                job.publish({"event": "progress", **payload})
+            return
+        worker.batch.discard(job_id)
+        if job:
+            job.status = kind
+            job.finished = time.time()
+            if kind == "done":
+                job.result = payload
+            else:
+                job.error = payload
+            job.publish({"event": kind, "job": job.as_dict()})
+        self._dispatch()
+
+    def _fail_worker(self, worker):
+        """A worker died: fail its jobs and start another in its place"""
+        for job_id in worker.batch:
+            self._fail_job(self.jobs.get(job_id), "Worker process exited")
+        self.workers.remove(worker)
+        worker.conn.close()
+        worker.process.join(0)
+        task = asyncio.ensure_future(self._replace_worker())
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+
+    def _fail_queued(self, error):
+        while self.queue:
+            self._fail_job(self.queue.popleft(), error)
+
+    def _fail_job(self, job, error):
+        if job and not job.done:
+            job.status = "failed"
+            job.error = error
+            job.finished = time.time()
+            job.publish({"event": "failed", "job": job.as_dict()})
+
+    def health(self):
+        statuses = [job.status for job in self.jobs.values()]
+        return {
+            "workers": len(self.workers),
+            "busy_workers": sum(1 for worker in self.workers if worker.batch),
+            "starting_workers": len(self._starting),
+            "queued": len(self.queue),
+            "max_queue": self.max_queue,
+            "jobs": {status: statuses.count(status) for status in ("queued", "running", "done", "failed")},
+        }
+
+    # === HTTP ===
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            if not request_line:
+                return
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"})
+                return
+            body = await reader.readexactly(length) if length else b""
+            await self._route(method, target.split("?", 1)[0], headers, body, writer)
+        except (ValueError, asyncio.IncompleteReadError) as exc:
+            await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, headers, body, writer):
+        parts = [part for part in path.split("/") if part]
+        if method == "GET" and parts == ["health"]:
+            await self._respond(writer, HTTPStatus.OK, self.health())
+        elif method == "POST" and parts == ["jobs"]:
+            # Only JSON: a browser cannot send it cross-site without a CORS preflight, which this service never grants
+            if headers.get("content-type", "").partition(";")[0].strip().lower() != "application/json":
+                await self._respond(writer, HTTPStatus.UNSUPPORTED_MEDIA_TYPE, {"error": "Expected application/json"})
+            else:
+                await self._post_jobs(body, writer)
+        elif method == "GET" and len(parts) in (2, 3) and parts[0] == "jobs" and parts[1:3] != [""]:
+            job = self.jobs.get(int(parts[1])) if parts[1].isdigit() else None
+            if job is None:
+                await self._respond(writer, HTTPStatus.NOT_FOUND, {"error": f"No job {parts[1]}"})
+            elif len(parts) == 2:
+                await self._respond(writer, HTTPStatus.OK, job.as_dict())
+            elif parts[2] == "events":
+                await self._stream(job, writer)
+            else:
+                await self._respond(writer, HTTPStatus.NOT_FOUND, {"error": f"Unknown path {path}"})
+        else:
+            await self._respond(writer, HTTPStatus.NOT_FOUND, {"error": f"Unknown path {method} {path}"})
+
+    async def _post_jobs(self, body, writer):
+        try:
+            request = json.loads(body or b"{}")
+            items = request["scenarios"] if "scenarios" in request else [request]
+            scenarios = [(item.get("config") or {}, item.get("seed")) for item in items]
+            jobs = self.submit(scenarios)
+        except (OverflowError, RuntimeError) as exc:
+            await self._respond(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(exc)})
+            return
+        except (ValueError, TypeError, AttributeError, KeyError) as exc:
+            await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": f"Invalid scenario: {exc}"})
+            return
+        await self._respond(writer, HTTPStatus.ACCEPTED, {"jobs": [job.id for job in jobs]})
+
+    async def _stream(self, job, writer):
+        """Progress events as chunked newline-delimited JSON, then the finished job"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        listener = asyncio.Queue()
+        job.listeners.append(listener)
+        try:
+            if job.done:
+                listener.put_nowait({"event": job.status, "job": job.as_dict()})
+            elif job.progress:
+                listener.put_nowait({"event": "progress", **job.progress})
+            while True:
+                event = await listener.get()
+                line = (dumps(event) + "\n").encode()
+                writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                await writer.drain()
+                if event["event"] in ("done", "failed"):
+                    break
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            job.listeners.remove(listener)
+
+    async def _respond(self, writer, status, payload):
+        body = dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+
+async def serve(host, port, workers, max_queue, batch_size):
+    service = ScenarioService(workers, max_queue, batch_size)
+    host, port = await service.start(host, port)
+    print(f"Scenario service on http://{host}:{port} with {workers} workers")
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", "-j", type=int, default=2)
+    parser.add_argument("--max-queue", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=4)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_queue, args.batch_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,24 @@
-import math
+import argparse
+import io
+import pickle
 import simpy
-import random
-from collections import deque, defaultdict
+import time
+import zlib
+from collections import Counter, deque, defaultdict
+from simpy.core import StopSimulation
+
+import numpy as np
+
+from analytics import DAY_MINUTES, compute_analytics
+from metrics import StreamingMetrics
+from arrivals import ArrivalSource, presample_arrivals
+from export import RecordExporter
+from fleet import DELIVERING, ONBOARD, WAITING_FOR_BUS, RobotFleet
+from network import Network, load_network, synthetic_network
+from profiling import Profiler
+from streams import RandomStreams
+from records import DELIVERED, PACKAGE_STATUSES, BusStateTable, NameIndex, PackageTable, PassengerTable
+from warehouse import PackageWarehouse
 
 # === Parameters ===
 BLUE_ROUTE = [
@@ -33,6 +50,11 @@ RED_ROUTE = [
 
 RED_BUS_STOPS = [stop["stop"] for stop in RED_ROUTE]
 
+DEFAULT_NETWORK = Network([
+    {"name": "red", "topology": "out_and_back", "stops": RED_ROUTE},
+    {"name": "blue", "topology": "loop", "stops": BLUE_ROUTE},
+], depot="Broekakkerseweg 26")
+
 BUS_PASSENGER_CAPACITY = 22  # Updated from demand estimation
 BUS_ROBOT_CAPACITY = 12
 ROBOTS_IN_WAREHOUSE = 72
@@ -41,7 +63,11 @@ STOP_TIME = 0.5
 TRIP_INTERVAL = 5  # Reduced from 15 to increase frequency
 ROBOT_CAPACITY = 10  # packages per robot
 ROBOT_SPEED = 5  # minutes per delivery
+ROBOT_BATTERY = 120  # minutes of driving on a full charge
+ROBOT_CHARGE_RATE = 0.5  # minutes of driving charged per minute docked
+ROBOT_RESERVE = 10  # least charge a robot leaves the depot with
 CHANCE_FOR_DELIVERY = 0.8
+PACKAGE_RATE = 0.25  # packages arriving at the warehouse per minute
 
 # Financial parameters
 COST_PER_BUS_PER_MINUTE = 0.40     # fuel, maintenance, driver
@@ -50,18 +76,6 @@ COST_FIXED_OVERHEAD = 100          # garage, coordination center, per day
 REVENUE_PER_PASSENGER = 2.00       # average fare per trip
 REVENUE_PER_PACKAGE = 5.00
 
-# === Global tracking variables ===
-stop_queues_red_route_forward = {stop["stop"]: deque() for stop in RED_ROUTE}
-stop_queues_red_route_backward = {stop["stop"]: deque() for stop in RED_ROUTE}
-stop_queues_blue_route = {stop["stop"]: deque() for stop in BLUE_ROUTE}
-robot_queues_red_route_backward = {stop["stop"]: deque() for stop in RED_ROUTE}
-robot_queues_blue_route = {stop["stop"]: deque() for stop in BLUE_ROUTE}
-all_passengers = []
-served_passengers = []
-all_packages = []
-missed_packages = []
-bus_states = defaultdict(list)
-
 # === Demand weighting by time of day ===
 hourly_demand_percent = {
     "06:00–07:00": 0.03,
@@ -88,364 +102,940 @@ for _, percent in hourly_demand_percent.items():
 
 assert len(minute_weights) == 960, f"Expected 960 minutes, got {len(minute_weights)}"
 
+HOURLY_DEMAND = list(hourly_demand_percent.values())
 
-# === Arrival Rate Function ===
-def get_passenger_rate(time, stop_name, route):
-    """Adjusted per-minute rate using demand weights"""
-    if time >= SIM_TIME:
-        return 0
-
-    # Find the stop dict in the route that matches stop_name
-    stop_info = next((stop for stop in route if stop["stop"] == stop_name), None)
-    if stop_info is None:
-        raise ValueError(f"Stop {stop_name} not found in route")
-
-    base_daily_demand = stop_info.get("expected_daily_passengers", 0)
-    return base_daily_demand * minute_weights[int(time)]
-
-
-def generate_passengers(env, stop_name, route, direction=None):
-    """Generate passengers with realistic demand patterns"""
-    possible_destinations = get_destinations_after_stop(route, stop_name, direction)
-    if not possible_destinations:
-        return
-    while True:
-        current_rate = get_passenger_rate(env.now, stop_name, route)
-        if current_rate > 0:
-            # Convert rate per minute to exponential distribution parameter
-            yield env.timeout(random.expovariate(current_rate))
-        else:
-            yield env.timeout(5)  # Check every 5 minutes if rate is 0
-            continue
-
-        # Weighted destination selection based on travel times and attractiveness
-        weights = [math.exp(-i) for i in range(len(possible_destinations))]
-        destination = random.choices(possible_destinations, weights=weights)[0]
-        arrival_time = env.now
-
-        if arrival_time > SIM_TIME - 60:
-            break
-
-        passenger = {
-            "origin": stop_name,
-            "destination": destination["stop"],
-            "arrival_time": arrival_time
-        }
-        stop_queues = get_stop_queues(route, direction)
-        stop_queues[stop_name].append(passenger)
-        all_passengers.append(passenger)
-
-
-def get_destinations_after_stop(route, stop_name, direction):
-    if route == RED_ROUTE and direction == "forward":
-        idx = RED_BUS_STOPS.index(stop_name)
-        return route[idx + 1 :]
-    elif route == RED_ROUTE and direction == "backward":
-        idx = RED_BUS_STOPS[::-1] .index(stop_name)
-        return route[::-1][idx + 1 :]
-    elif route == BLUE_ROUTE:
-        idx = BLUE_BUS_STOPS.index(stop_name)
-        return route[idx + 1 :] + route[:idx]
-    else:
-        raise ValueError("Unknown route")
-
-
-def get_stop_queues(route, direction):
-    if route == RED_ROUTE and direction == "forward":
-        return stop_queues_red_route_forward
-    elif route == RED_ROUTE and direction == "backward":
-        return stop_queues_red_route_backward
-    elif route == BLUE_ROUTE:
-        return stop_queues_blue_route
-    else:
-        raise ValueError("Unknown route")
-
-
-def get_robots(env, route, direction):
-    global ROBOTS_IN_WAREHOUSE
+# Saturdays and Sundays: ~80% of weekday volume, no commuter peaks
+WEEKEND_DEMAND = [0.02, 0.03, 0.04, 0.05, 0.06, 0.07, 0.07, 0.07, 0.07, 0.06, 0.06, 0.05, 0.05, 0.04, 0.03, 0.02]
 
-    if route == RED_ROUTE and direction == "backward":
-        return []
 
-    route_colour = "red" if route is RED_ROUTE else "blue"
-    result = []
-
-    with package_lock.request() as req:
-        yield req
-
-        for pkg in all_packages:
-            if (
-                    pkg["status"] == "waiting_in_warehouse"
-                    and pkg["route_colour"] == route_colour
-                    and pkg["arrival_time"] <= env.now
-            ):
-                if ROBOTS_IN_WAREHOUSE <= 0:
-                    break
-
-                pkg["status"] = "onboard"
-                result.append(pkg)
-                ROBOTS_IN_WAREHOUSE -= 1
-
-                if len(result) >= BUS_ROBOT_CAPACITY:
-                    break
+# Fleet schedule: each block launches buses `start` minutes after 06:00 and keeps them running for `duration` minutes;
+# the other keys are route names and how many buses to put on each
+DEFAULT_SCHEDULE = [
+    {"label": "OffPeak-AM", "start": 0, "duration": SIM_TIME, "red": 2, "blue": 1},   # all day
+    {"label": "Peak-AM", "start": 60, "duration": 240, "red": 2, "blue": 1},          # 07:00–11:00
+    {"label": "Peak-PM", "start": 600, "duration": 180, "red": 2, "blue": 1},         # 16:00–19:00
+]
 
-    return result
+DEFAULT_CONFIG = {
+    "bus_passenger_capacity": BUS_PASSENGER_CAPACITY,
+    "bus_robot_capacity": BUS_ROBOT_CAPACITY,
+    "robots_in_warehouse": ROBOTS_IN_WAREHOUSE,
+    "sim_time": SIM_TIME,
+    "stop_time": STOP_TIME,
+    "trip_interval": TRIP_INTERVAL,
+    "robot_speed": ROBOT_SPEED,
+    "robot_capacity": ROBOT_CAPACITY,
+    "robot_battery": ROBOT_BATTERY,
+    "robot_charge_rate": ROBOT_CHARGE_RATE,
+    "robot_reserve": ROBOT_RESERVE,
+    # Which docked robots a bus takes: a name from fleet.DISPATCH_POLICIES or a policy function
+    "dispatch_policy": "longest_docked",
+    "chance_for_delivery": CHANCE_FOR_DELIVERY,
+    "package_rate": PACKAGE_RATE,
+    "cost_per_bus_per_minute": COST_PER_BUS_PER_MINUTE,
+    "cost_per_robot_delivery": COST_PER_ROBOT_DELIVERY,
+    "cost_fixed_overhead": COST_FIXED_OVERHEAD,
+    "revenue_per_passenger": REVENUE_PER_PASSENGER,
+    "revenue_per_package": REVENUE_PER_PACKAGE,
+    "schedule": DEFAULT_SCHEDULE,
+    # None for the red/blue network, else a Network, its as_dict() form, or a .json/.csv/GTFS path for load_network
+    "network": None,
+    # "process": one generator per stop and direction; "presampled": whole day drawn up front with NumPy.
+    # Not interchangeable: "process" draws each gap at the rate of the minute it starts in, so it misses demand
+    # when the hourly rate rises; on the default network it yields ~5% fewer passengers (795.6 vs 835.6 mean
+    # over 40 seeds, 832 expected). Compare runs within one mode only.
+    "arrival_mode": "process",
+    # "full": keep every record for analysis; "streaming": fold records into online accumulators, so memory stays
+    # flat however many days run, at about half the speed of "full"
+    "record_mode": "full",
+    # Multi-day runs: day d starts at d * DAY_MINUTES and uses the demand profile week[d % len(week)]
+    "days": 1,
+    "demand_profiles": {"weekday": HOURLY_DEMAND, "weekend": WEEKEND_DEMAND},
+    "week": ["weekday"] * 5 + ["weekend"] * 2,
+    # Instrumentation: None (off, no overhead), "summary" (per-process steps and timings) or "trace" (also every step)
+    "profile": None,
+    # True: one seeded random stream per arrival source, destination choice, bus, stop and the packages, so
+    # scenarios run on a seed share their randomness (common random numbers); False: one stream for everything
+    "random_streams": True,
+    # Directory to stream finished passenger, package and bus-state records to, as memory-mappable columns
+    "export": None,
+}
 
 
-def generate_packages(env):
-    all_stops = list({stop["stop"] for stop in RED_ROUTE + BLUE_ROUTE if stop["stop"] != "Broekakkerseweg 26"})
+def make_config(overrides=None):
+    """Return a full simulation config, applying `overrides` on top of the defaults"""
+    config = dict(DEFAULT_CONFIG)
+    for key, value in (overrides or {}).items():
+        if key not in DEFAULT_CONFIG:
+            raise ValueError(f"Unknown config parameter: {key}")
+        config[key] = value
+    hours = -(-config["sim_time"] // 60)
+    for day_type in config["week"]:
+        if len(config["demand_profiles"][day_type]) < hours:
+            raise ValueError(f"Demand profile {day_type!r} does not cover {hours} hours")
+    return config
 
-    while True:
-        arrival_time = env.now
 
-        if arrival_time > SIM_TIME - 180:
-            break
+def resolve_network(network):
+    """The Network a config's "network" value stands for"""
+    if network is None:
+        return DEFAULT_NETWORK
+    if isinstance(network, Network):
+        return network
+    if isinstance(network, dict):
+        return Network.from_dict(network)
+    return load_network(network)
+
 
-        delivery_stop = random.choice(all_stops)
-        # Determine which route the delivery stop is on
-        if any(stop["stop"] == delivery_stop for stop in RED_ROUTE):
-            route_colour = "red"
+def schedule_for(network, buses_per_route=1, schedule=DEFAULT_SCHEDULE):
+    """`schedule`'s shift blocks with `buses_per_route` buses on every route of `network`"""
+    return [
+        {"label": block["label"], "start": block["start"], "duration": block["duration"],
+         **{name: buses_per_route for name in network.route_names}}
+        for block in schedule
+    ]
+
+
+class Onboard:
+    """Entities on a bus, bucketed by the stop where they leave it"""
+
+    __slots__ = ("by_stop", "count")
+
+    def __init__(self, items=(), key=None):
+        self.by_stop = defaultdict(list)
+        self.count = 0
+        for item in items:
+            self.add(key(item), item)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for bucket in self.by_stop.values():
+            yield from bucket
+
+    def add(self, stop, item):
+        self.by_stop[stop].append(item)
+        self.count += 1
+
+    def pop(self, stop):
+        """Remove and return everything leaving at `stop`, in boarding order"""
+        bucket = self.by_stop.pop(stop, None)
+        if bucket is None:
+            return ()
+        self.count -= len(bucket)
+        return bucket
+
+
+class Task:
+    """State of one running process, kept off its generator's stack so a snapshot can pickle it
+
+    Every process sets `task.phase` to where it continues before it yields, and on entry
+    skips ahead to that phase, so a restored task carries on from its state alone. A live
+    process just runs on after its yield: the phase costs one compare per step.
+    """
+
+    def __init__(self, kind, **state):
+        self.kind = kind
+        self.phase = "start"
+        self.wake_at = None  # set by snapshot(): when the task's pending timeout fires
+        self.__dict__.update(state)
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickles the network's stop index by reference: the restoring simulation rebuilds it from the config"""
+
+    def __init__(self, file, stops):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.stops = stops
+
+    def persistent_id(self, obj):
+        return "stops" if obj is self.stops else None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    def __init__(self, file, stops):
+        super().__init__(file)
+        self.stops = stops
+
+    def persistent_load(self, pid):
+        return self.stops
+
+
+class MothershipSimulation:
+    """One replication of the mothership day: owns the environment, queues and all tracked records"""
+
+    # What a snapshot carries besides the clock and the running tasks
+    SNAPSHOT_STATE = ("passengers", "packages", "bus_states", "buses", "metrics", "warehouse", "fleet",
+                      "stop_queues", "robot_queues", "totals", "day_results", "rng", "arrival_rng")
+    # Config keys a restored snapshot cannot change: its record tables, robot fleet and random streams were built
+    # under them. A fleet or stream what-if has to be its own run, or the config of the run that is snapshotted.
+    SNAPSHOT_FIXED = ("network", "record_mode", "arrival_mode", "robots_in_warehouse", "robot_capacity",
+                      "robot_battery", "robot_charge_rate", "robot_reserve", "dispatch_policy", "random_streams")
+
+    def __init__(self, config=None, seed=None):
+        self.config = make_config(config)
+        self.seed = seed
+        self.rng = RandomStreams(seed, shared=not self.config["random_streams"])
+        self.arrival_rng = np.random.default_rng(seed)
+
+        self.network = network = resolve_network(self.config["network"])
+        for block in self.config["schedule"]:
+            for key in block.keys() - {"label", "start", "duration"}:
+                if key not in network.routes_by_name:
+                    raise ValueError(f"Schedule block {block['label']!r} names unknown route: {key}")
+        if self.config["arrival_mode"] not in ("process", "presampled"):
+            raise ValueError(f"Unknown arrival mode: {self.config['arrival_mode']}")
+
+        # Stops and buses are interned to small ids; records live in columnar tables
+        self.stops = network.stops
+        self.buses = NameIndex()
+        self.passengers = PassengerTable(self.stops, network.route_names)
+        self.packages = PackageTable(self.stops, network.route_names)
+        self.bus_states = BusStateTable(self.stops, self.buses, network.route_names)
+        if self.config["record_mode"] == "streaming":
+            self.metrics = StreamingMetrics(self.stops, self.buses, network.route_names)
+        elif self.config["record_mode"] == "full":
+            self.metrics = None
         else:
-            route_colour = "blue"
-
-        package = {
-            "delivery_stop": delivery_stop,
-            "route_colour": route_colour,
-            "arrival_time": arrival_time,
-            "delivery_time": None,
-            "status": "waiting_in_warehouse",
-            "onboard_bus_id": None
-        }
-
-        all_packages.append(package)
-
-        yield env.timeout(random.expovariate(0.25))
-
-
-def mothership_bus(env, bus_id, route, run_duration):
-    """Enhanced bus process with realistic travel times and utilization tracking"""
-    global ROBOTS_IN_WAREHOUSE
-    onboard_passengers = []
-    end_time = env.now + run_duration
-
-    last_trip = False
-    all_stops = [stop["stop"] for stop in route]
-    stops = [stop["stop"] for stop in route]
-    direction = "forward"
-    try:
-        while True:
-            stop_queues = get_stop_queues(route, direction)
-            onboard_robots = yield from get_robots(env, route, direction)
-            for i, current_stop in enumerate(stops):
-                if env.now >= end_time:
-                    last_trip = True
-
-                # Drop-off passengers
-                initial_onboard = len(onboard_passengers)
-                drop_offs = [p for p in onboard_passengers if p['destination'] == current_stop]
-                drop_offs_robots = [p for p in onboard_robots if p['delivery_stop'] == current_stop]
-                for passenger in drop_offs:
-                    onboard_passengers.remove(passenger)
-                    passenger['dropoff_time'] = env.now
-                    passenger['travel_time'] = passenger['dropoff_time'] - passenger['pickup_time']
-                    served_passengers.append(passenger)
-                if not last_trip:
-                    for robot in drop_offs_robots:
-                        onboard_robots.remove(robot)
-                        env.process(deliver_package(env, robot, route, current_stop))
-
-                # Stop time
-                if current_stop == "Broekakkerseweg 26" or current_stop == "Eindhoven, Wijnpeerstraat": # end stop
-                    if last_trip and "Broekakkerseweg 26":
+            raise ValueError(f"Unknown record mode: {self.config['record_mode']}")
+
+        self.exporter = None  # opened by start()
+        self.profiler = Profiler(trace=self.config["profile"] == "trace") if self.config["profile"] else None
+        self.env = simpy.Environment()
+        self.fleet = RobotFleet(self.config["robots_in_warehouse"], self.stops, self.config["robot_capacity"],
+                                self.config["robot_battery"], self.config["robot_charge_rate"],
+                                self.config["robot_reserve"], self.config["dispatch_policy"])
+        self.warehouse = PackageWarehouse(self.packages, len(network.routes), recycle=self.metrics is not None)
+
+        # Waiting passengers per leg and stop, robots waiting for pickup per route and stop
+        self.sources = self.arrival_sources()
+        self.stop_queues = [{stop: deque() for stop in leg.stops} for leg in network.legs]
+        self.robot_queues = [{stop: deque() for stop in route.stops} for route in network.routes]
+
+        # Running totals behind the per-day results, cheap to diff at every day boundary
+        self.totals = Counter()
+        self.day_results = []
+        self.wall_time = 0.0
+        self.on_day_end = None
+
+        # Live processes, task -> SimPy process, and the day clock process that ends the run
+        self.tasks = {}
+        self.clock = None
+        self.clock_started = (time.perf_counter(), 0)
+        self.events = 0  # SimPy events processed so far by run() and advance()
+        self._minute_weights = {}
+
+    def day_type(self, day):
+        week = self.config["week"]
+        return week[day % len(week)]
+
+    def minute_weights(self, day):
+        day_type = self.day_type(day)
+        weights = self._minute_weights.get(day_type)
+        if weights is None:
+            profile = self.config["demand_profiles"][day_type]
+            if profile is HOURLY_DEMAND:
+                weights = minute_weights
+            else:
+                weights = [percent / 60 for percent in profile for _ in range(60)]
+            self._minute_weights[day_type] = weights
+        return weights
+
+    # === Arrival Rate Function ===
+    def get_passenger_rate(self, time, source, weights=minute_weights):
+        """Adjusted per-minute rate using demand weights; `time` is minutes since the day's 06:00"""
+        if time >= self.config["sim_time"]:
+            return 0
+        return source.daily_demand * weights[int(time)]
+
+    # === Processes ===
+    def spawn(self, kind, **state):
+        """Start the process method `kind` on a new task holding `state`"""
+        return self._start(Task(kind, **state))
+
+    def _start(self, task):
+        generator = getattr(self, task.kind)(task) if task.wake_at is None else self._resume(task)
+        if self.profiler is not None:
+            generator = self.profiler.wrap(task.kind, generator)
+        process = self.env.process(generator)
+        self.tasks[task] = process
+        process.callbacks.append(lambda _: self.tasks.pop(task))
+        if task.kind == "day_clock":
+            self.clock = process
+        return process
+
+    def _resume(self, task):
+        """A restored task: sleep out the rest of its timeout, then carry on from its phase"""
+        yield self.env.timeout(task.wake_at - self.env.now)
+        yield from getattr(self, task.kind)(task)
+
+    def arrival_sources(self):
+        """Every stop and leg that generates passengers"""
+        sources = []
+        for leg in self.network.legs:
+            demand = dict(zip(leg.route.stops, leg.route.demand))
+            for stop in leg.stops:
+                if leg.destinations[stop]:
+                    sources.append(ArrivalSource(leg, stop, demand[stop], leg.destinations[stop]))
+        return sources
+
+    def add_passenger(self, queue, source, destination, arrival_time):
+        route = source.leg.route.index
+        queue.append(self.passengers.add(source.stop, destination, route, arrival_time))
+        self.totals["passengers_created"] += 1
+        if self.metrics:
+            self.metrics.passenger_created(source.stop, route, arrival_time)
+
+    def generate_passengers(self, task):
+        """Generate passengers with realistic demand patterns"""
+        env = self.env
+        timeout = env.timeout
+        source = self.sources[task.source]
+        queue = self.stop_queues[source.leg.index][source.stop]
+        arrivals = self.rng(f"arrivals/{source.leg.index}/{source.stop}")
+        destinations = self.rng(f"destinations/{source.leg.index}/{source.stop}")
+        cutoff = self.config["sim_time"] - 60
+        while task.day < self.config["days"]:
+            day_start = task.day * DAY_MINUTES
+            if task.phase == "start":
+                task.phase = "wait"
+                if env.now < day_start:
+                    yield timeout(day_start - env.now)
+
+            weights = self.minute_weights(task.day)
+            while True:
+                if task.phase == "arrive":
+                    destination = destinations.choices(source.destinations, weights=source.weights)[0]
+                    arrival_time = env.now
+                    if arrival_time - day_start > cutoff:
                         break
-                    yield env.timeout(random.expovariate(TRIP_INTERVAL))  # TRIP_INTERVAL between 5 and 10
+                    self.add_passenger(queue, source, destination, arrival_time)
+                    task.phase = "wait"
+
+                current_rate = self.get_passenger_rate(env.now - day_start, source, weights)
+                if current_rate > 0:
+                    # Convert rate per minute to exponential distribution parameter
+                    task.phase = "arrive"
+                    yield timeout(arrivals.expovariate(current_rate))
                 else:
-                    yield env.timeout(random.expovariate(STOP_TIME))  # STOP_TIME between 0.5 and 1
-
-                picked_up = 0
-                if not last_trip:
-                    # Pick-up passengers
-                    queue = stop_queues[current_stop]
-                    while queue and len(onboard_passengers) < BUS_PASSENGER_CAPACITY:
-                        passenger = queue.popleft()
-                        passenger['pickup_time'] = env.now
-                        passenger['wait_time'] = passenger['pickup_time'] - passenger['arrival_time']
-                        onboard_passengers.append(passenger)
-                        picked_up += 1
-
-                    # Pick up robots
-                    if route != RED_ROUTE or direction == "backward":
-                        if route == BLUE_ROUTE:
-                            queue = robot_queues_blue_route[current_stop]
+                    yield timeout(5)  # Check every 5 minutes if rate is 0
+
+            task.day += 1
+            task.phase = "start"
+
+    def passenger_arrival_stream(self, task):
+        """Feed a pre-sampled day of arrivals for all stops into the queues from one process"""
+        env = self.env
+        timeout = env.timeout
+        sources = self.sources
+        hours = self.config["sim_time"] // 60
+        queues = [self.stop_queues[source.leg.index][source.stop] for source in sources]
+        while task.day < self.config["days"]:
+            day_start = task.day * DAY_MINUTES
+            if task.phase == "start":
+                task.phase = "sample"
+                if env.now < day_start:
+                    yield timeout(day_start - env.now)
+            if task.phase == "sample":
+                profile = self.config["demand_profiles"][self.day_type(task.day)]
+                times, source_ids, destination_ids = presample_arrivals(
+                    self.arrival_rng, sources, profile[:hours], self.config["sim_time"] - 60
+                )
+                task.arrivals = ((times + day_start).tolist(), source_ids.tolist(), destination_ids.tolist())
+                task.index = 0
+                task.phase = "next"
+
+            times, source_ids, destination_ids = task.arrivals
+            while task.index < len(times):
+                arrival_time = times[task.index]
+                if task.phase == "next" and arrival_time > env.now:
+                    task.phase = "arrive"
+                    yield timeout(arrival_time - env.now)
+                s = source_ids[task.index]
+                source = sources[s]
+                self.add_passenger(queues[s], source, source.destinations[destination_ids[task.index]], arrival_time)
+                task.index += 1
+                task.phase = "next"
+
+            task.arrivals = None
+            task.day += 1
+            task.phase = "start"
+
+    def load_robots(self, leg):
+        """Dispatch robots with the oldest waiting packages for this leg's route, one stop per robot"""
+        if not leg.loads_robots:
+            return []
+
+        now = self.env.now
+        cargo = self.warehouse.load_by_stop(leg.route.index, self.config["bus_robot_capacity"],
+                                            self.fleet.capacity)
+        robots = self.fleet.dispatch(now, len(cargo))
+        groups = iter(cargo)
+        for robot, (stop, packages) in zip(robots, groups):
+            self.fleet.load(robot, stop, packages)
+            for package in packages:
+                self.packages.pickup_time[package] = now
+        for stop, packages in groups:  # no charged robot left for these
+            self.warehouse.return_packages(packages)
+        return robots
+
+    def dock_robots(self, robots):
+        """Robots back at the depot: their undelivered packages go back to the warehouse"""
+        now = self.env.now
+        for robot in robots:
+            self.warehouse.return_packages(self.fleet.dock(robot, now))
+
+    def generate_packages(self, task):
+        env = self.env
+        package_stops = self.network.package_stops
+        rng = self.rng("packages")
+        package_route = self.network.package_route
+
+        while task.day < self.config["days"]:
+            day_start = task.day * DAY_MINUTES
+            if task.phase == "start":
+                task.phase = "create"
+                if env.now < day_start:
+                    yield env.timeout(day_start - env.now)
+                continue
+
+            arrival_time = env.now
+            if arrival_time - day_start > self.config["sim_time"] - 180:
+                task.day += 1
+                task.phase = "start"
+                continue
+
+            delivery_stop = rng.choice(package_stops)
+            route_colour = package_route[delivery_stop]
+
+            package = self.packages.add(delivery_stop, route_colour, arrival_time)
+            self.warehouse.add(package)
+            self.totals["packages_created"] += 1
+            if self.metrics:
+                self.metrics.package_created(delivery_stop, route_colour, arrival_time)
+
+            yield env.timeout(rng.expovariate(self.config["package_rate"]))
+
+    def mothership_bus(self, task):
+        """Enhanced bus process with realistic travel times and utilization tracking
+
+        Each trip loads robots, then alternates "arrive" (drop-offs, dwell) and "board"
+        (pick-ups, travel on) over its stops and returns robots at the end; after the last
+        trip the bus parks.
+        """
+        env = self.env
+        timeout = env.timeout
+        config = self.config
+        capacity = config["bus_passenger_capacity"]
+        passengers = self.passengers
+        metrics = self.metrics
+        route = self.network.routes[task.route]
+        terminals = route.terminals
+        robot_queues = self.robot_queues[route.index]
+        # One dwell stream per schedule slot: the slot's bus takes it up again every day
+        expovariate = self.rng(f"dwell/{task.name}").expovariate
+
+        try:
+            while True:
+                leg, stops, travel_times = route.trip(task.trip)
+                stop_queues = self.stop_queues[leg.index]
+                if task.phase == "start":
+                    task.onboard_robots = Onboard(self.load_robots(leg), self.fleet.robots.stop.__getitem__)
+                    task.position = 0
+                    task.phase = "arrive"
+
+                while task.position < len(stops):
+                    current_stop = stops[task.position]
+                    if task.phase == "arrive":
+                        if env.now >= task.end_time:
+                            task.last_trip = True
+
+                        # Drop-off passengers
+                        task.dropped_off = self.drop_off(task.onboard_passengers.pop(current_stop), env.now)
+                        if not task.last_trip:
+                            for robot in task.onboard_robots.pop(current_stop):
+                                self.spawn("deliver_package", robot=robot, route=route.index, stop=current_stop,
+                                           index=0)
+
+                        # Stop time
+                        task.phase = "board"
+                        if current_stop in terminals:
+                            if task.last_trip:
+                                break
+                            yield timeout(expovariate(config["trip_interval"]))  # TRIP_INTERVAL between 5 and 10
                         else:
-                            queue = robot_queues_red_route_backward[current_stop]
-
-                        while queue and len(onboard_robots) < BUS_ROBOT_CAPACITY:
-                            robot = queue.popleft()
-                            robot['pickup_time'] = env.now
-                            onboard_robots.append(robot)
-
-
-                # Record bus state
-                bus_states[bus_id].append({
-                    'time': env.now,
-                    'stop': current_stop,
-                    'passengers': len(onboard_passengers),
-                    'capacity': BUS_PASSENGER_CAPACITY,
-                    'utilization': len(onboard_passengers) / BUS_PASSENGER_CAPACITY,
-                    'picked_up': picked_up,
-                    'dropped_off': initial_onboard - len(onboard_passengers) + len(drop_offs),
-                    'robots': len(onboard_robots)
-                })
-
-                # Travel to next stop (if not last stop)
-                travel_time = route[i]['travel_time_to_next']
-                yield env.timeout(travel_time)
-
-            # Return robots to warehouse
-            if route != RED_ROUTE or direction == "backward":
-                with package_lock.request() as req:
-                    yield req
-                    for robot in onboard_robots:
-                        if robot['status'] == "onboard":
-                            robot['status'] = "waiting_in_warehouse"
-                    ROBOTS_IN_WAREHOUSE = ROBOTS_IN_WAREHOUSE + len(onboard_robots)
-
-            if last_trip and "Broekakkerseweg 26":
-                break
-
-            # Reverse direction for red route
-            if route is RED_ROUTE:
-                if direction == "forward":
-                    direction = "backward"
-                    stops = all_stops[::-1]
-                else:
-                    direction = "forward"
-                    stops = all_stops[1:]
-
-    except simpy.Interrupt:
-        print(f"{bus_id} interrupted at {env.now}")
-
-
-def deliver_package(env, robot, route, stop_name):
-    yield env.timeout(random.expovariate(ROBOT_SPEED)) # Time to delivery
-    if random.random() < 0.8:
-        robot['delivery_time'] = env.now
-        robot['status'] = "delivered"
-    # else: status remains unchanged
-    yield env.timeout(random.expovariate(ROBOT_SPEED)) # Time to return to bus station
-    if route == RED_ROUTE:
-        robot_queues_red_route_backward[stop_name].append(robot)
-    elif route == BLUE_ROUTE:
-        robot_queues_blue_route[stop_name].append(robot)
+                            yield timeout(expovariate(config["stop_time"]))  # STOP_TIME between 0.5 and 1
+
+                    onboard_passengers = task.onboard_passengers
+                    picked_up = 0
+                    if not task.last_trip:
+                        # Pick-up passengers
+                        queue = stop_queues[current_stop]
+                        while queue and len(onboard_passengers) < capacity:
+                            passenger = queue.popleft()
+                            passengers.pickup_time[passenger] = env.now
+                            onboard_passengers.add(passengers.destination[passenger], passenger)
+                            picked_up += 1
+
+                        # Pick up robots
+                        if leg.collects_robots and robot_queues[current_stop]:
+                            self.pick_up_robots(task, current_stop)
+
+                    self.record_bus_state(task, env.now, current_stop, picked_up)
+
+                    # Travel to next stop (if not last stop)
+                    task.phase = "arrive"
+                    task.position += 1
+                    yield timeout(travel_times[task.position - 1])
+
+                # Return robots to warehouse
+                if leg.collects_robots:
+                    self.dock_robots(task.onboard_robots)
+                    task.onboard_robots = Onboard()
+                if task.last_trip:
+                    break
+                task.trip += 1
+                task.phase = "start"
+
+            # Robots still aboard when the shift ends go back to the warehouse with the bus
+            self.dock_robots(task.onboard_robots)
+
+            if self.exporter:
+                for passenger in task.onboard_passengers:
+                    self.exporter.add_row("passengers", passengers, passenger)
+            if metrics:
+                for passenger in task.onboard_passengers:
+                    passengers.release(passenger)
+
+        except simpy.Interrupt:
+            print(f"{task.name} interrupted at {env.now}")
+
+    def drop_off(self, leaving, time):
+        """Passengers `leaving` the bus at `time` are served; returns how many"""
+        passengers = self.passengers
+        totals = self.totals
+        metrics = self.metrics
+        exporter = self.exporter
+        for passenger in leaving:
+            passengers.dropoff_time[passenger] = time
+            totals["passengers_served"] += 1
+            totals["wait_time"] += passengers.pickup_time[passenger] - passengers.arrival_time[passenger]
+            if exporter:
+                exporter.add_row("passengers", passengers, passenger)
+            if metrics:
+                metrics.passenger_served(passengers.origin[passenger], passengers.route[passenger],
+                                         passengers.arrival_time[passenger], passengers.pickup_time[passenger], time)
+                passengers.release(passenger)
+        return len(leaving)
+
+    def pick_up_robots(self, task, stop):
+        """Robots waiting at `stop` board the bus, as many as fit"""
+        fleet = self.fleet
+        onboard_robots = task.onboard_robots
+        queue = self.robot_queues[task.route][stop]
+        while queue and len(onboard_robots) < self.config["bus_robot_capacity"]:
+            robot = queue.popleft()
+            fleet.set_state(robot, ONBOARD)
+            onboard_robots.add(stop, robot)
+
+    def record_bus_state(self, task, time, stop, picked_up):
+        capacity = self.config["bus_passenger_capacity"]
+        onboard = len(task.onboard_passengers)
+        if task.last_state_time is not None:
+            self.totals["bus_minutes"] += time - task.last_state_time
+        task.last_state_time = time
+        if self.metrics:
+            self.metrics.bus_state(task.bus, time, onboard, capacity)
+        else:
+            self.bus_states.add(task.bus, time, stop, onboard, capacity, picked_up, task.dropped_off,
+                                len(task.onboard_robots))
+        if self.exporter:
+            self.exporter.add("bus_states", bus=task.bus, time=time, stop=stop, passengers=onboard, capacity=capacity,
+                              picked_up=picked_up, dropped_off=task.dropped_off, robots=len(task.onboard_robots))
+
+    def deliver_package(self, task):
+        """A robot dropped off at a stop delivers its packages one by one, then waits there for a bus"""
+        env = self.env
+        fleet = self.fleet
+        robot = task.robot
+        rng = self.rng(f"robots/{task.stop}")
+        if task.phase == "start":
+            fleet.set_state(robot, DELIVERING)
+            task.phase = "drop"
+            trip = rng.expovariate(self.config["robot_speed"])  # Time to delivery
+            fleet.drive(robot, trip)
+            yield env.timeout(trip)
+
+        cargo = fleet.cargo[robot]
+        while task.phase == "drop":
+            package = cargo[task.index]
+            if rng.random() < self.config["chance_for_delivery"]:
+                self.packages.delivery_time[package] = env.now
+                self.warehouse.mark_delivered(package)
+                fleet.robots.deliveries[robot] += 1
+                self.totals["packages_delivered"] += 1
+                if self.exporter:
+                    self.exporter.add_row("packages", self.packages, package)
+                if self.metrics:
+                    packages = self.packages
+                    self.metrics.package_delivered(packages.delivery_stop[package], packages.route_colour[package],
+                                                   packages.arrival_time[package], env.now)
+            # else: status remains unchanged, the package rides back to the warehouse
+            task.index += 1
+            if task.index == len(cargo):
+                task.phase = "back"  # Time to return to bus station, else to the next address
+            trip = rng.expovariate(self.config["robot_speed"])
+            fleet.drive(robot, trip)
+            yield env.timeout(trip)
+
+        fleet.set_state(robot, WAITING_FOR_BUS)
+        self.robot_queues[task.route][task.stop].append(robot)
+
+    def launch_buses(self, num, label_prefix, run_duration, route):
+        for i in range(num):
+            # One id per schedule slot, reused every day, so bus ids stay few however long the horizon
+            bus_name = f"{label_prefix}-{route.name}-{i+1}"
+            self.spawn("mothership_bus", name=bus_name, bus=self.buses.intern(bus_name), route=route.index,
+                       end_time=self.env.now + run_duration, trip=0, position=0, last_trip=False,
+                       last_state_time=None, onboard_passengers=Onboard(), onboard_robots=Onboard(), dropped_off=0)
+
+    def schedule_blocks(self):
+        return sorted(self.config["schedule"], key=lambda b: b["start"])
+
+    def mothership_scheduler(self, task):
+        """Launch the configured fleet blocks at their start times, every day"""
+        env = self.env
+        blocks = self.schedule_blocks()
+        while task.day < self.config["days"]:
+            day_start = task.day * DAY_MINUTES
+            if task.phase == "start":
+                task.phase = "block"
+                task.block = 0
+                if env.now < day_start:
+                    yield env.timeout(day_start - env.now)
+            elif task.block == len(blocks):
+                task.day += 1
+                task.phase = "start"
+            elif task.phase == "block":
+                task.phase = "launch"
+                start = day_start + blocks[task.block]["start"]
+                if start > env.now:
+                    yield env.timeout(start - env.now)
+            else:
+                block = blocks[task.block]
+                for route in self.network.routes:
+                    self.launch_buses(block.get(route.name, 0), block["label"], block["duration"], route)
+                task.block += 1
+                task.phase = "block"
+
+    def day_clock(self, task):
+        """Close every day after its drain hour: tally unserved passengers and emit the day's results"""
+        env = self.env
+        while task.day < self.config["days"]:
+            if task.phase == "start":
+                task.phase = "close"
+                yield env.timeout(task.day * DAY_MINUTES + self.config["sim_time"] + 60 - env.now)
+                continue
+
+            # Passengers still waiting at closing time go home; packages and stranded robots carry over
+            for queues in self.stop_queues:
+                for queue in queues.values():
+                    if self.exporter:
+                        for passenger in queue:
+                            self.exporter.add_row("passengers", self.passengers, passenger)
+                    if self.metrics:
+                        for passenger in queue:
+                            self.passengers.release(passenger)
+                    queue.clear()
+
+            day_totals = self.totals - task.previous
+            task.previous = Counter(self.totals)
+            started, first_day = self.clock_started
+            elapsed = time.perf_counter() - started
+            financials = compute_financials(self.config, day_totals["bus_minutes"], day_totals["passengers_served"],
+                                            day_totals["packages_delivered"])
+            result = {
+                "day": task.day + 1,
+                "day_type": self.day_type(task.day),
+                "passengers_created": day_totals["passengers_created"],
+                "passengers_served": day_totals["passengers_served"],
+                "average_wait": day_totals["wait_time"] / day_totals["passengers_served"]
+                if day_totals["passengers_served"] else 0.0,
+                "packages_created": day_totals["packages_created"],
+                "packages_delivered": day_totals["packages_delivered"],
+                "packages_waiting": len(self.warehouse),
+                "robots_in_warehouse": len(self.fleet.docked),
+                "net_profit": financials["net_profit"],
+                "sim_days_per_second": (task.day + 1 - first_day) / elapsed if elapsed else 0.0,
+            }
+            self.day_results.append(result)
+            if self.on_day_end:
+                self.on_day_end(result)
+            task.day += 1
+            task.phase = "start"
+
+    # === Simulation Setup ===
+    def start(self):
+        """Create the run's processes; a no-op once started or restored"""
+        if self.profiler and not self.profiler.monitoring:
+            self.env.process(self.profiler.monitor(self.env))
+        if self.config["export"] and self.exporter is None:
+            dictionaries = {"stops": self.stops.names, "routes": list(self.network.route_names),
+                            "buses": self.buses.names, "package_statuses": PACKAGE_STATUSES}
+            self.exporter = RecordExporter(self.config["export"], dictionaries,
+                                           {"seed": self.seed, "days": self.config["days"], "start": self.env.now})
+        if self.clock is not None:
+            return
+
+        # Start passenger generators
+        if self.config["arrival_mode"] == "presampled":
+            self.spawn("passenger_arrival_stream", day=0, arrivals=None, index=0)
+        else:
+            for i in range(len(self.sources)):
+                self.spawn("generate_passengers", source=i, day=0)
+
+        self.spawn("generate_packages", day=0)
+
+        # Start schedulers
+        self.spawn("mothership_scheduler", day=0, block=0)
+        self.spawn("day_clock", day=0, previous=Counter())
+
+    def advance(self, until):
+        """Simulate up to (not including) minute `until`, e.g. to take a snapshot there"""
+        self.start()
+        env = self.env
+        while env.peek() < until:
+            env.step()
+            self.events += 1
+        env.run(until=until)  # nothing left before `until`: just moves the clock there
+
+    def _run_until(self, event):
+        """env.run(until=event), counting the events processed on the way"""
+        if event.callbacks is None:
+            return  # already processed
+        event.callbacks.append(StopSimulation.callback)
+        step = self.env.step
+        try:
+            while True:
+                step()
+                self.events += 1
+        except StopSimulation:
+            pass
+
+    def run(self, on_day_end=None):
+        """Run all configured days and return the structured summary
+
+        `on_day_end` is called with each day's results as soon as that day closes.
+        """
+        started = time.perf_counter()
+        self.on_day_end = on_day_end
+        self.clock_started = (started, len(self.day_results))
+        self.start()
+
+        # Run simulation until the last day closes, one extra hour after service for buses to drop off the remaining passengers
+        self._run_until(self.clock)
+        self.wall_time = time.perf_counter() - started
+        if self.profiler:
+            self.profiler.run_time += self.wall_time
+
+        # === Post-processing ===
+        if self.exporter:
+            self.export_remaining_packages()
+            self.exporter.close()
+
+        return self.summary()
+
+    def export_remaining_packages(self):
+        """Packages not delivered by the end of the run; delivered ones went out as they were delivered"""
+        packages = self.packages
+        free = set(packages._free)
+        for package in range(packages.size):
+            if packages.status[package] != DELIVERED and package not in free:
+                self.exporter.add_row("packages", packages, package)
+
+    # === Snapshots ===
+    def snapshot(self):
+        """The whole simulation state at the current time, as a zlib-compressed pickle"""
+        state = {name: getattr(self, name) for name in self.SNAPSHOT_STATE}
+        state["now"] = self.env.now
+        # Every task waits on a timeout, or on its start if it has not run yet; restored in the
+        # order SimPy would have woken them, so tasks due at the same time keep their order
+        order = {event: (time, priority, eid) for time, priority, eid, event in self.env._queue}
+        for task, process in self.tasks.items():
+            task.wake_at = order[process.target][0] if isinstance(process.target, simpy.Timeout) else None
+        state["tasks"] = sorted(self.tasks, key=lambda task: order[self.tasks[task].target])
+        buffer = io.BytesIO()
+        _SnapshotPickler(buffer, self.stops).dump(state)
+        payload = {"config": self.config, "seed": self.seed, "state": buffer.getvalue()}
+        return zlib.compress(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def restore(cls, snapshot, overrides=None):
+        """A simulation that carries on from `snapshot`, under `overrides` from then on
+
+        The state is carried over as it was; config read after the snapshot time follows the
+        overrides, e.g. a different "schedule" for the rest of the day. Overriding a key of
+        SNAPSHOT_FIXED raises ValueError. A restored run does not export: the records written
+        before the snapshot belong to the run that took it.
+        """
+        payload = pickle.loads(zlib.decompress(snapshot))
+        overrides = overrides or {}
+        for key in cls.SNAPSHOT_FIXED:
+            if key in overrides and overrides[key] != payload["config"][key]:
+                raise ValueError(f"Cannot change {key!r} when restoring a snapshot")
+        if overrides.get("export"):
+            raise ValueError("Cannot export a restored snapshot: its earlier records are not in the snapshot")
+        sim = cls({**payload["config"], **overrides, "export": None}, payload["seed"])
+
+        state = _SnapshotUnpickler(io.BytesIO(payload["state"]), sim.stops).load()
+        sim.env = simpy.Environment(initial_time=state.pop("now"))
+        tasks = state.pop("tasks")
+        for name, value in state.items():
+            setattr(sim, name, value)
+        for task in tasks:
+            if task.kind == "mothership_scheduler" and "schedule" in overrides:
+                sim.reschedule(task)
+            sim._start(task)
+        return sim
+
+    def reschedule(self, task):
+        """Point a restored scheduler at the first block of its day the new schedule has not launched yet"""
+        if task.phase == "start":
+            return
+        elapsed = self.env.now - task.day * DAY_MINUTES
+        task.block = sum(1 for block in self.schedule_blocks() if block["start"] < elapsed)
+        task.phase = "block"
+        task.wake_at = None
+
+    def analytics(self):
+        """Aggregates of the run so far, from the record tables or the streaming accumulators"""
+        if self.profiler:
+            with self.profiler.span("analytics"):
+                return self.metrics.snapshot() if self.metrics else compute_analytics(self)
+        if self.metrics:
+            return self.metrics.snapshot()
+        return compute_analytics(self)
+
+    def summary(self, analytics=None):
+        """Headline metrics of a finished run as a plain dict"""
+        analytics = analytics or self.analytics()
+        passengers = analytics["passengers"]
+        packages = analytics["packages"]
+        return {
+            "seed": self.seed,
+            "passengers_created": passengers["created"],
+            "passengers_served": passengers["served"],
+            "service_rate": passengers["service_rate"],
+            "average_wait": passengers["avg_wait"],
+            "packages_created": packages["created"],
+            "packages_delivered": packages["delivered"],
+            "packages_remaining": packages["remaining"],
+            "bus_utilization": analytics["buses"]["utilization"],
+            "financials": calculate_financials(self, analytics),
+            "days": self.config["days"],
+            "wall_time": self.wall_time,
+            "sim_days_per_second": self.config["days"] / self.wall_time if self.wall_time else 0.0,
+        }
 
 
-def launch_buses(num, label_prefix, run_duration, route_colour):
-    for i in range(num):
-        bus_name = f"{label_prefix}-{i+1}"
-        route = RED_ROUTE if route_colour == "red" else BLUE_ROUTE
-        env.process(mothership_bus(env, bus_name, route, run_duration))
+def run_simulation(config=None, seed=None, on_day_end=None, cache=None):
+    """Run one replication and return its summary dict
 
+    With a result_cache.ResultCache as `cache` a seeded run already simulated under the
+    same parameters is answered from it (day callbacks need a live run and bypass it).
+    """
+    if cache is not None and on_day_end is None:
+        return cache.run(config, seed)
+    return MothershipSimulation(config, seed).run(on_day_end)
 
-def mothership_scheduler(env):
-    # Initially 4 buses that run all day
-    launch_buses(2, "OffPeak-AM", SIM_TIME, "red")
-    launch_buses(1, "OffPeak-AM", SIM_TIME, "blue")
-    yield env.timeout(60)  # 06:00 → 07:00
 
-    # # Peak hours - launch two more
-    launch_buses(2, "OffPeak-AM", 240, "red")
-    launch_buses(1, "OffPeak-AM", 240, "blue")
-    yield env.timeout(540)  # 07:00–16:00
+def run_branches(scenarios, config=None, seed=None, at=600):
+    """Simulate up to minute `at` once, then finish the run once per scenario of config overrides
 
-    # # Evening peak
-    launch_buses(2, "OffPeak-AM", 180, "red")
-    launch_buses(1, "OffPeak-AM", 180, "blue")
-    yield env.timeout(420)  # 16:00–23:00
+    Every branch shares the prefix (by default 06:00–16:00) and its random streams, so the
+    scenarios differ only in what they change from `at` onwards.
+    """
+    sim = MothershipSimulation(config, seed)
+    sim.advance(at)
+    snapshot = sim.snapshot()
+    return [MothershipSimulation.restore(snapshot, overrides).run() for overrides in scenarios]
 
 
 # === Analysis Functions ===
-def analyze_bus_utilization():
-    """Analyze bus utilization patterns"""
-    if not bus_states:
-        return {}
-
-    all_states = []
-    for bus_id, states in bus_states.items():
-        all_states.extend(states)
-
-    if not all_states:
-        return {}
-
-    total_observations = len(all_states)
-    empty_count = sum(1 for state in all_states if state['passengers'] == 0)
-    full_count = sum(1 for state in all_states if state['passengers'] == state['capacity'])
-
-    utilizations = [state['utilization'] for state in all_states]
-    avg_utilization = sum(utilizations) / len(utilizations) if utilizations else 0
-
-    return {
-        'total_observations': total_observations,
-        'percent_empty': (empty_count / total_observations) * 100,
-        'percent_full': (full_count / total_observations) * 100,
-        'average_utilization': avg_utilization * 100,
-        'can_board_probability': ((total_observations - full_count) / total_observations) * 100
-    }
-
-
-def calculate_financials():
+def compute_financials(config, bus_minutes, passengers_served, packages_delivered, days=1):
+    """Costs, revenue and profit from the run's counts"""
     # Bus operation cost
-    total_bus_minutes = sum(
-        records[-1]['time'] - records[0]['time']
-        for bus, records in bus_states.items() if records
-    )
-    bus_cost = total_bus_minutes * COST_PER_BUS_PER_MINUTE
+    bus_cost = bus_minutes * config["cost_per_bus_per_minute"]
 
     # Robot delivery cost
-    delivered_packages = [p for p in all_packages if p['status'] == 'delivered']
-    robot_cost = len(delivered_packages) * COST_PER_ROBOT_DELIVERY
+    robot_cost = packages_delivered * config["cost_per_robot_delivery"]
 
     # Fixed daily overhead
-    fixed_cost = COST_FIXED_OVERHEAD
+    fixed_cost = config["cost_fixed_overhead"] * days
 
     # Total cost
     total_cost = bus_cost + robot_cost + fixed_cost
 
     # Revenue
-    passenger_revenue = len(served_passengers) * REVENUE_PER_PASSENGER
-    package_revenue = len(delivered_packages) * REVENUE_PER_PACKAGE
+    passenger_revenue = passengers_served * config["revenue_per_passenger"]
+    package_revenue = packages_delivered * config["revenue_per_package"]
     total_revenue = passenger_revenue + package_revenue
 
     # Profit
     net_profit = total_revenue - total_cost
 
+    return {
+        "bus_cost": bus_cost,
+        "robot_cost": robot_cost,
+        "fixed_cost": fixed_cost,
+        "total_cost": total_cost,
+        "passenger_revenue": passenger_revenue,
+        "package_revenue": package_revenue,
+        "total_revenue": total_revenue,
+        "net_profit": net_profit,
+    }
+
+
+def calculate_financials(sim, analytics=None):
+    analytics = analytics or sim.analytics()
+    return compute_financials(sim.config, analytics["buses"]["bus_minutes"], analytics["passengers"]["served"],
+                              analytics["packages"]["delivered"], sim.config["days"])
+
+
+def print_financials(financials):
     print("\n--- FINANCIAL ANALYSIS ---")
-    print(f"Total bus operation cost:     €{bus_cost:.2f}")
-    print(f"Total robot delivery cost:    €{robot_cost:.2f}")
-    print(f"Fixed overhead cost:          €{fixed_cost:.2f}")
-    print(f"→ Total operating cost:       €{total_cost:.2f}")
-    print(f"\nRevenue from passengers:      €{passenger_revenue:.2f}")
-    print(f"Revenue from packages:        €{package_revenue:.2f}")
-    print(f"→ Total revenue:              €{total_revenue:.2f}")
-    print(f"\n💸 Net profit/loss:            €{net_profit:.2f}")
+    print(f"Total bus operation cost:     €{financials['bus_cost']:.2f}")
+    print(f"Total robot delivery cost:    €{financials['robot_cost']:.2f}")
+    print(f"Fixed overhead cost:          €{financials['fixed_cost']:.2f}")
+    print(f"→ Total operating cost:       €{financials['total_cost']:.2f}")
+    print(f"\nRevenue from passengers:      €{financials['passenger_revenue']:.2f}")
+    print(f"Revenue from packages:        €{financials['package_revenue']:.2f}")
+    print(f"→ Total revenue:              €{financials['total_revenue']:.2f}")
+    print(f"\n💸 Net profit/loss:            €{financials['net_profit']:.2f}")
 
 
-def print_comprehensive_report():
+def print_comprehensive_report(sim, analytics=None):
     """Print detailed simulation results"""
+    analytics = analytics or sim.analytics()
+    passengers = analytics["passengers"]
+    packages = analytics["packages"]
+
     print("="*80)
     print("COMPREHENSIVE TRANSPORT SIMULATION RESULTS")
     print("="*80)
 
     # Passenger Transport Analysis
     print("\n--- PASSENGER TRANSPORT ---")
-    print(f"Total passengers created:     {len(all_passengers)}")
-    print(f"Total passengers served:      {len(served_passengers)}")
-    print(f"Total passengers missed:      {len(all_passengers) - len(served_passengers)}")
-    print(f"Service rate:                 {len(served_passengers)/len(all_passengers)*100:.1f}%")
+    print(f"Total passengers created:     {passengers['created']}")
+    print(f"Total passengers served:      {passengers['served']}")
+    print(f"Total passengers missed:      {passengers['missed']}")
+    print(f"Service rate:                 {passengers['service_rate']*100:.1f}%")
+    print(f"Average / p95 wait:           {passengers['avg_wait']:.2f} / {passengers['p95_wait']:.2f} minutes")
 
     # Bus Utilization Analysis
     print("\n--- BUS UTILIZATION ---")
-    util_stats = analyze_bus_utilization()
+    util_stats = analytics["buses"]["utilization"]
     if util_stats:
         print(f"Average bus utilization:      {util_stats['average_utilization']:.1f}%")
         print(f"Time buses empty:             {util_stats['percent_empty']:.1f}%")
@@ -454,71 +1044,102 @@ def print_comprehensive_report():
 
     # Package Delivery Analysis
     print("\n--- PACKAGE DELIVERY ---")
-    print(f"Created packages:             {len(all_packages)}")
-    delivered_packages = [p for p in all_packages if p["status"] == "delivered"]
-    print(f"Delivered packages:           {len(delivered_packages)}")
-    remained = [p for p in all_packages if p["status"] == "onboard" or p["status"] == "waiting_in_warehouse"]
-    print(f"Packages left in warehouse:   {len(remained)}")
-
-    if delivered_packages:
-        delivery_times = [p['total_time'] for p in delivered_packages if 'total_time' in p]
-        if delivery_times:
-            print(f"Average delivery time:        {sum(delivery_times)/len(delivery_times):.2f} minutes")
+    print(f"Created packages:             {packages['created']}")
+    print(f"Delivered packages:           {packages['delivered']}")
+    print(f"Packages left in warehouse:   {packages['remaining']}")
+    if packages['delivered']:
+        print(f"Average delivery time:        {packages['avg_delivery_time']:.2f} minutes")
 
     # Per-Neighborhood Analysis
+    per_stop = sorted(analytics["per_stop"].items())
     print("\n--- PER-NEIGHBORHOOD PASSENGER ANALYSIS ---")
-    print(f"{'Neighborhood':<31} | {'Created':<8} | {'Served':<8} | {'Avg Wait':<10}")
-    print("-" * 75)
-
-    ALL_BUS_STOPS = set([stop["stop"] for stop in BLUE_ROUTE] + [stop["stop"] for stop in RED_ROUTE])
-    for stop in ALL_BUS_STOPS:
-        created = len([p for p in all_passengers if p['origin'] == stop])
-        served = len([p for p in served_passengers if p['origin'] == stop])
-
-        wait_times = [p['wait_time'] for p in served_passengers
-                      if p['origin'] == stop and 'wait_time' in p]
-        avg_wait = sum(wait_times) / len(wait_times) if wait_times else 0
-
-        print(f"{stop:<31} | {created:<8} | {served:<8} | {avg_wait:<10.2f}")
+    print(f"{'Neighborhood':<31} | {'Created':<8} | {'Served':<8} | {'Avg Wait':<10} | {'Std Wait':<10} | "
+          f"{'P95 Wait':<10} | {'Avg Travel':<10} | {'P95 Travel':<10}")
+    print("-" * 127)
+    for stop, row in per_stop:
+        print(f"{stop:<31} | {row['created']:<8} | {row['served']:<8} | {row['avg_wait']:<10.2f} | "
+              f"{row['std_wait']:<10.2f} | {row['p95_wait']:<10.2f} | {row['avg_travel']:<10.2f} | "
+              f"{row['p95_travel']:<10.2f}")
 
     print("\n--- PER-NEIGHBORHOOD PACKAGE ANALYSIS ---")
     print(f"{'Neighborhood':<31} | {'Created':<8} | {'Delivered':<10} | {'Missed':<8}")
     print("-" * 60)
-
-    for stop in ALL_BUS_STOPS:
-        created = len([p for p in all_packages if p['delivery_stop'] == stop and p['delivery_stop'] != "Broekakkerseweg 26"])
-        delivered = len([p for p in delivered_packages if p['delivery_stop'] == stop and p['delivery_stop'] != "Broekakkerseweg 26"])
-        missed = len([p for p in remained if p['delivery_stop'] == stop and p['delivery_stop'] != "Broekakkerseweg 26"])
-
-        print(f"{stop:<31} | {created:<8} | {delivered:<10} | {missed:<8}")
-
-
-# === Simulation Setup ===
-env = simpy.Environment()
-package_lock = simpy.Resource(env, capacity=1)
-
-
-# Start passenger generators
-for stop in BLUE_BUS_STOPS:
-    env.process(generate_passengers(env, stop, BLUE_ROUTE))
-for stop in RED_BUS_STOPS:
-    env.process(generate_passengers(env, stop, RED_ROUTE, "forward"))
-    env.process(generate_passengers(env, stop, RED_ROUTE, "backward"))
-
-env.process(generate_packages(env))
-
-# Start schedulers
-env.process(mothership_scheduler(env))
-
-# Run simulation
-env.run(until=SIM_TIME + 60) # One extra hour for buses to drop off the remaining passengers
-
-# === Post-processing ===
-# Add missed passengers and packages
-package_queues = {**robot_queues_red_route_backward, **robot_queues_blue_route}
-for queue in package_queues.values():
-    missed_packages.extend(queue)
-
-# Run the comprehensive analysis
-print_comprehensive_report()
-calculate_financials()
\ No newline at end of file
+    for stop, row in per_stop:
+        print(f"{stop:<31} | {row['packages_created']:<8} | {row['packages_delivered']:<10} | {row['packages_missed']:<8}")
+
+    print("\n--- PER-ROUTE ANALYSIS ---")
+    print(f"{'Route':<8} | {'Created':<8} | {'Served':<8} | {'Avg Wait':<10} | {'Delivered':<10} | {'Missed':<8}")
+    print("-" * 68)
+    for route, row in analytics["per_route"].items():
+        print(f"{route:<8} | {row['created']:<8} | {row['served']:<8} | {row['avg_wait']:<10.2f} | "
+              f"{row['packages_delivered']:<10} | {row['packages_missed']:<8}")
+
+    print("\n--- PER-HOUR ANALYSIS ---")
+    print(f"{'Hour':<12} | {'Created':<8} | {'Served':<8} | {'Avg Wait':<10} | {'P95 Wait':<10} | "
+          f"{'Delivered':<10} | {'Missed':<8}")
+    print("-" * 86)
+    for hour, row in analytics["per_hour"].items():
+        print(f"{hour:<12} | {row['created']:<8} | {row['served']:<8} | {row['avg_wait']:<10.2f} | {row['p95_wait']:<10.2f} | "
+              f"{row['packages_delivered']:<10} | {row['packages_missed']:<8}")
+
+
+def print_day_result(result):
+    print(f"Day {result['day']:>3} ({result['day_type']:<7}) | "
+          f"passengers {result['passengers_served']:>5}/{result['passengers_created']:<5} | "
+          f"wait {result['average_wait']:6.2f} | packages {result['packages_delivered']:>4}/{result['packages_created']:<4} | "
+          f"profit €{result['net_profit']:9.2f} | {result['sim_days_per_second']:.2f} sim-days/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mothership bus and delivery-robot simulation")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--streaming", action="store_true",
+                        help="flat-memory metrics instead of full records (about 2x slower)")
+    parser.add_argument("--presampled", action="store_true", help="pre-sample passenger arrivals with NumPy (about 5%% more demand than the default mode)")
+    parser.add_argument("--network", help="route network: .json, .csv or a GTFS feed directory")
+    parser.add_argument("--synthetic-routes", type=int, help="simulate a generated network with this many routes")
+    parser.add_argument("--profile", action="store_true", help="print where the run's wall time went")
+    parser.add_argument("--trace", help="also write every process step to this Chrome trace / speedscope file")
+    parser.add_argument("--export", help="write passenger, package and bus-state records to this directory")
+    args = parser.parse_args()
+
+    config = {"days": args.days}
+    if args.profile or args.trace:
+        config["profile"] = "trace" if args.trace else "summary"
+    if args.network or args.synthetic_routes:
+        network = load_network(args.network) if args.network else synthetic_network(args.synthetic_routes)
+        config["network"] = network
+        config["schedule"] = schedule_for(network)
+    if args.streaming:
+        config["record_mode"] = "streaming"
+    if args.presampled:
+        config["arrival_mode"] = "presampled"
+    if args.export:
+        config["export"] = args.export
+
+    simulation = MothershipSimulation(config, args.seed)
+    summary = simulation.run(on_day_end=print_day_result if args.days > 1 else None)
+
+    # Run the comprehensive analysis
+    analytics = simulation.analytics()
+    profiler = simulation.profiler
+    if profiler:
+        with profiler.span("report"):
+            print_comprehensive_report(simulation, analytics)
+    else:
+        print_comprehensive_report(simulation, analytics)
+    print_financials(calculate_financials(simulation, analytics))
+    if args.days > 1:
+        print(f"\nSimulated {summary['days']} days in {summary['wall_time']:.1f}s "
+              f"({summary['sim_days_per_second']:.2f} sim-days/s)")
+    if profiler:
+        print("\n--- PROFILE ---")
+        print(profiler.report())
+    if args.trace:
+        profiler.export_trace(args.trace)
+        print(f"Trace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
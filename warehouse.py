@@ -0,0 +1,83 @@
+import heapq
+from collections import deque
+
+from records import DELIVERED, ONBOARD, PACKAGE_STATUSES, WAITING
+
+
+class PackageWarehouse:
+    """Packages waiting for a robot, queued per route colour in arrival order
+
+    New packages arrive in time order, so they go on a plain FIFO. Packages coming back
+    from a bus are older than most of that FIFO and go on a small heap instead; loading
+    a bus takes the older head of the two, so it costs O(k log r) for k robots and r
+    returned packages rather than a scan over the whole day's packages.
+    """
+
+    def __init__(self, packages, route_count, recycle=False):
+        self.packages = packages
+        self.recycle = recycle  # release delivered rows once their robot is back (streaming runs)
+        self._fresh = [deque() for _ in range(route_count)]
+        self._returned = [[] for _ in range(route_count)]
+        self.status_counts = [0] * len(PACKAGE_STATUSES)
+
+    def __len__(self):
+        return self.status_counts[WAITING]
+
+    def add(self, package):
+        self.packages.status[package] = WAITING
+        self.status_counts[WAITING] += 1
+        self._fresh[self.packages.route_colour[package]].append(package)
+
+    def load_by_stop(self, route_colour, limit, capacity):
+        """The oldest waiting packages for this route colour, as (delivery stop, packages) groups
+
+        Fills up to `limit` groups of up to `capacity` packages, one group per robot; a
+        stop whose group is full starts another. Loading stops at the first package that
+        would need a group past the limit.
+        """
+        fresh = self._fresh[route_colour]
+        returned = self._returned[route_colour]
+        arrival_time = self.packages.arrival_time
+        delivery_stop = self.packages.delivery_stop
+        status = self.packages.status
+        groups = []
+        filling = {}
+        loaded = 0
+        while fresh or returned:
+            from_returned = returned and (not fresh or returned[0] < (arrival_time[fresh[0]], fresh[0]))
+            package = returned[0][1] if from_returned else fresh[0]
+            stop = delivery_stop[package]
+            group = filling.get(stop)
+            if group is None or len(group) == capacity:
+                if len(groups) == limit:
+                    break
+                group = filling[stop] = []
+                groups.append((stop, group))
+            if from_returned:
+                heapq.heappop(returned)
+            else:
+                fresh.popleft()
+            status[package] = ONBOARD
+            group.append(package)
+            loaded += 1
+        self.status_counts[WAITING] -= loaded
+        self.status_counts[ONBOARD] += loaded
+        return groups
+
+    def return_packages(self, packages):
+        """Put undelivered packages back in the queue; delivered ones just free their robot"""
+        status = self.packages.status
+        for package in packages:
+            if status[package] == ONBOARD:
+                status[package] = WAITING
+                self.status_counts[ONBOARD] -= 1
+                self.status_counts[WAITING] += 1
+                heapq.heappush(self._returned[self.packages.route_colour[package]],
+                               (self.packages.arrival_time[package], package))
+            elif self.recycle and status[package] == DELIVERED:
+                self.packages.release(package)
+
+    def mark_delivered(self, package):
+        self.packages.status[package] = DELIVERED
+        self.status_counts[ONBOARD] -= 1
+        self.status_counts[DELIVERED] += 1